@@ -1,6 +1,32 @@
+import os
+from pathlib import Path
+
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from dotenv import load_dotenv
+
+
+def _time_queries(sender, connection, **kwargs):
+    from .metrics import time_queries
+
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
 
 
 class AtsApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ats_api'
+
+    def ready(self):
+        # Every SQL query, on every thread's connection, is timed as the "db" stage
+        connection_created.connect(_time_queries, dispatch_uid="ats_api_time_queries")
+
+        # Opt-in (SIMILARITY_MODEL_WARMUP=1): meant for web processes, so the first
+        # evaluation does not pay the model load; management commands stay fast without it.
+        # views (and everything it imports) is only loaded here when warm-up is on
+        load_dotenv(Path(__file__).resolve().parent.parent / ".env")
+
+        if os.getenv("SIMILARITY_MODEL_WARMUP", "").lower() in ("1", "true", "yes"):
+            from . import views
+
+            views.warm_up_similarity_model()
@@ -0,0 +1,151 @@
+# batches.py
+"""
+Background evaluation batches.
+
+Uploads are stored as EvaluationBatch / EvaluationBatchItem rows by the API and
+processed later by `manage.py run_batch_worker`, which runs the same pipeline
+as `evaluate_cv_vs_offer`. The SQLite database is the only queue: workers claim
+a pending batch with a conditional UPDATE, so several worker processes can run
+side by side without an external broker.
+"""
+
+import json
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EvaluationBatch, EvaluationBatchItem
+from .views import (
+    cached_extract_job,
+    save_job_offer,
+    extract_cvs,
+    save_extracted_cv,
+    try_evaluate_saved_cvs,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next_batch() -> Optional[EvaluationBatch]:
+    """Atomically move the oldest pending batch to running and return it"""
+
+    while True:
+        batch = (
+            EvaluationBatch.objects
+            .filter(status=EvaluationBatch.PENDING)
+            .order_by("id")
+            .first()
+        )
+        if batch is None:
+            return None
+
+        # Another worker may have claimed it between the SELECT and the UPDATE
+        claimed = EvaluationBatch.objects.filter(
+            id=batch.id, status=EvaluationBatch.PENDING
+        ).update(status=EvaluationBatch.RUNNING, started_at=timezone.now(), heartbeat_at=timezone.now())
+
+        if claimed:
+            batch.refresh_from_db()
+            return batch
+
+
+def requeue_stale_batches(max_age: timedelta) -> int:
+    """Put back batches left running by a worker that died mid-batch (no progress for max_age)"""
+
+    cutoff = timezone.now() - max_age
+    return EvaluationBatch.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=EvaluationBatch.RUNNING,
+    ).update(status=EvaluationBatch.PENDING, started_at=None, heartbeat_at=None)
+
+
+def process_batch(batch: EvaluationBatch) -> None:
+    """Run job extraction and CV evaluation for a claimed batch"""
+
+    try:
+        job_data = cached_extract_job(batch.job_description, refresh=batch.refresh_job)
+        job_offer = save_job_offer(batch.job_description, job_data)
+    except Exception as e:
+        logger.exception(f"Batch {batch.id}: failed to extract job data")
+        _finish_batch(batch, EvaluationBatch.FAILED, f"Failed to analyze job description: {str(e)}")
+        return
+
+    batch.job_offer = job_offer
+    batch.save(update_fields=["job_offer"])
+
+    job_text = batch.job_description + " " + " ".join(job_data.get("job_competences", []))
+    # EXTRACTED items were saved but not scored before a crash: their PDF hash is
+    # known, so extract_cvs reuses the stored extraction instead of calling Gemini
+    items = list(batch.items.filter(
+        status__in=[EvaluationBatchItem.PENDING, EvaluationBatchItem.EXTRACTED]
+    ).order_by("id"))
+    files = {}
+
+    for item in items:
+        pdf = File(item.source_pdf.open("rb"), name=item.filename)
+        pdf.content_type = "application/pdf"
+        files[pdf] = item
+
+    saved = []
+
+    try:
+        # Unordered so progress is visible per CV as soon as each one finishes
+        for pdf, cv_data, error in extract_cvs(list(files), ordered=False):
+            item = files[pdf]
+            try:
+                if error is not None:
+                    raise error
+
+                saved.append((pdf, cv_data, save_extracted_cv(pdf, cv_data)))
+                item.status = EvaluationBatchItem.EXTRACTED
+
+            except ValueError as e:
+                item.status = EvaluationBatchItem.FAILED
+                item.error = str(e)
+            except Exception as e:
+                logger.exception(f"Batch {batch.id}: failed to process {item.filename}")
+                item.status = EvaluationBatchItem.FAILED
+                item.error = f"Processing error: {str(e)}"
+
+            item.save(update_fields=["status", "error"])
+            _heartbeat(batch)
+
+        # Score every extracted CV of the batch in a single encode pass
+        for (pdf, _, _), (result, error) in zip(saved, try_evaluate_saved_cvs(saved, job_offer, job_text)):
+            item = files[pdf]
+            if error is None:
+                item.status = EvaluationBatchItem.DONE
+                item.evaluation_id = result["evaluation_id"]
+                item.result = json.dumps(result, ensure_ascii=False)
+            else:
+                item.status = EvaluationBatchItem.FAILED
+                item.error = error
+            item.save(update_fields=["status", "error", "evaluation", "result"])
+    finally:
+        for pdf in files:
+            pdf.close()
+
+    # Nothing may stay half-done once the batch is finished
+    batch.items.filter(
+        status__in=[EvaluationBatchItem.PENDING, EvaluationBatchItem.EXTRACTED]
+    ).update(status=EvaluationBatchItem.FAILED, error="Not processed")
+
+    if batch.items.filter(status=EvaluationBatchItem.DONE).exists():
+        _finish_batch(batch, EvaluationBatch.DONE)
+    else:
+        _finish_batch(batch, EvaluationBatch.FAILED, "No CVs could be processed")
+
+
+def _finish_batch(batch: EvaluationBatch, status: str, error: Optional[str] = None) -> None:
+    batch.status = status
+    batch.error = error
+    batch.finished_at = timezone.now()
+    batch.save(update_fields=["status", "error", "finished_at"])
+
+
+def _heartbeat(batch: EvaluationBatch) -> None:
+    EvaluationBatch.objects.filter(id=batch.id).update(heartbeat_at=timezone.now())
@@ -0,0 +1,311 @@
+# embedding_server.py
+"""
+Shared embedding service over a Unix socket.
+
+Without it every WSGI worker loads its own SentenceTransformer. With
+`manage.py run_embedding_server` one process holds the model and every worker
+sends its texts there instead (EMBEDDING_SERVER_SOCKET):
+
+    - EmbeddingClient has the same encode() signature as the model, so
+      encode_texts() does not know whether the model is local or remote
+    - DynamicBatcher merges the texts of concurrent callers into one forward
+      pass: the first request waits at most `max_wait` seconds for others,
+      up to `max_batch_texts` texts per pass
+
+Wire format, both directions: 8-byte header (JSON length, payload length, big
+endian) + JSON + binary payload. A request is {"op": "encode", "texts": [...]}
+or {"op": "stats"}; an encode response is {"shape": [n, dim]} with the float32
+vectors as payload, errors are {"error": "..."}.
+
+This module does not depend on Django.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct(">II")
+
+
+class EmbeddingServerError(RuntimeError):
+    """The embedding server is unreachable or failed to encode."""
+    pass
+
+
+def send_frame(sock: socket.socket, header: dict, payload: bytes = b"") -> None:
+    data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    sock.sendall(HEADER.pack(len(data), len(payload)) + data + payload)
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(min(size - len(buf), 1 << 20))
+        if not chunk:
+            raise ConnectionError("Connection closed")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> tuple[dict, bytes]:
+    header_size, payload_size = HEADER.unpack(recv_exact(sock, HEADER.size))
+    header = json.loads(recv_exact(sock, header_size))
+    return header, recv_exact(sock, payload_size) if payload_size else b""
+
+
+# SERVER
+
+class DynamicBatcher:
+    """Runs encode_fn on the texts of several concurrent submit() calls at once"""
+
+    def __init__(self, encode_fn: Callable[[list[str]], np.ndarray], max_batch_texts: int = 64, max_wait: float = 0.005):
+        self.encode_fn = encode_fn
+        self.max_batch_texts = max(1, max_batch_texts)
+        self.max_wait = max_wait
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "texts": 0, "batches": 0, "encode_s": 0.0}
+
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: list[str]) -> np.ndarray:
+        future = Future()
+        self._queue.put((texts, future))
+        return future.result()
+
+    def _collect(self) -> list:
+        """Block for one request, then gather others until the batch is full or max_wait passes"""
+
+        batch = [self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+
+            started = time.perf_counter()
+            try:
+                vectors = np.asarray(self.encode_fn(texts), dtype=np.float32) if texts else None
+            except Exception as e:
+                logger.exception("Batch of %d texts failed", len(texts))
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+
+            start = 0
+            for item_texts, future in batch:
+                end = start + len(item_texts)
+                future.set_result(vectors[start:end] if item_texts else np.zeros((0, 0), dtype=np.float32))
+                start = end
+
+            with self._lock:
+                self._stats["requests"] += len(batch)
+                self._stats["texts"] += len(texts)
+                self._stats["batches"] += 1
+                self._stats["encode_s"] += elapsed
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_batch_texts"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["avg_requests_per_batch"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["encode_s"] = round(stats["encode_s"], 3)
+        stats["queued"] = self._queue.qsize()
+        return stats
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    """Loads the model in the background and serves encode requests through a DynamicBatcher"""
+
+    daemon_threads = True
+    # Every thread of every worker keeps its own connection, they may all connect at once
+    request_queue_size = 256
+
+    def __init__(
+        self,
+        socket_path: str,
+        model_loader: Callable,
+        model_id: str,
+        batch_size: int = 32,
+        max_batch_texts: int = 64,
+        max_wait: float = 0.005,
+    ):
+        self.model_id = model_id
+        self.batch_size = batch_size
+        self.model = None
+        self.model_error = None
+        self._model_ready = threading.Event()
+
+        # A previous server that was killed leaves its socket file behind
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, EmbeddingRequestHandler)
+
+        self.batcher = DynamicBatcher(self._encode, max_batch_texts, max_wait)
+        threading.Thread(target=self._load, args=(model_loader,), name="embedding-model-load", daemon=True).start()
+
+    def _load(self, model_loader: Callable) -> None:
+        started = time.perf_counter()
+        try:
+            self.model = model_loader()
+            logger.info("Embedding model %s loaded in %.1fs", self.model_id, time.perf_counter() - started)
+        except Exception as e:
+            logger.exception("Embedding model failed to load")
+            self.model_error = str(e)
+        self._model_ready.set()
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        self._model_ready.wait()
+        if self.model is None:
+            raise EmbeddingServerError(f"Model failed to load: {self.model_error}")
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+
+    def model_status(self) -> str:
+        if self.model is not None:
+            return "loaded"
+        if self.model_error:
+            return f"error: {self.model_error}"
+        return "warming"
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+class EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    """One client connection, any number of requests"""
+
+    def handle(self):
+        while True:
+            try:
+                header, _ = recv_frame(self.request)
+            except (ConnectionError, OSError, struct.error, ValueError):
+                return
+
+            op = header.get("op")
+            try:
+                if op == "encode":
+                    vectors = self.server.batcher.submit(list(header.get("texts", [])))
+                    send_frame(self.request, {"shape": list(vectors.shape)}, vectors.tobytes())
+                elif op == "stats":
+                    send_frame(self.request, {
+                        "model_id": self.server.model_id,
+                        "model": self.server.model_status(),
+                        "batching": self.server.batcher.get_stats(),
+                    })
+                else:
+                    send_frame(self.request, {"error": f"Unknown op '{op}'"})
+            except OSError:
+                return
+            except Exception as e:
+                try:
+                    send_frame(self.request, {"error": str(e)})
+                except OSError:
+                    return
+
+
+# CLIENT
+
+class EmbeddingClient:
+    """Drop-in for SentenceTransformer.encode() backed by the embedding server (one connection per thread)"""
+
+    def __init__(self, socket_path: str, model_id: Optional[str] = None, timeout: float = 60):
+        self.socket_path = socket_path
+        self.model_id = model_id
+        self.timeout = timeout
+        self._local = threading.local()
+        self._checked = False
+
+    def _connect(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def _call(self, header: dict) -> tuple[dict, bytes]:
+        # One retry on a fresh connection (server restarted, idle socket closed)
+        for attempt in range(2):
+            try:
+                sock = self._connect()
+                send_frame(sock, header)
+                response, payload = recv_frame(sock)
+                break
+            except (ConnectionError, OSError) as e:
+                self._close()
+                if attempt or isinstance(e, socket.timeout):
+                    raise EmbeddingServerError(f"Embedding server unreachable at {self.socket_path}: {e}")
+
+        if "error" in response:
+            raise EmbeddingServerError(response["error"])
+        return response, payload
+
+    def stats(self) -> dict:
+        return self._call({"op": "stats"})[0]
+
+    def _check_model(self) -> None:
+        """Refuse vectors from a server running another model/backend (they would poison the cache)"""
+
+        if self._checked or self.model_id is None:
+            return
+        server_model = self.stats().get("model_id")
+        if server_model != self.model_id:
+            raise EmbeddingServerError(
+                f"Embedding server runs {server_model}, this process expects {self.model_id}"
+            )
+        self._checked = True
+
+    def encode(self, texts, batch_size: int = 32, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """Same call as SentenceTransformer.encode (batching is decided by the server)"""
+
+        single = isinstance(texts, str)
+        self._check_model()
+        response, payload = self._call({"op": "encode", "texts": [texts] if single else list(texts)})
+
+        vectors = np.frombuffer(payload, dtype=np.float32).reshape(response["shape"])
+        return vectors[0] if single else vectors
@@ -0,0 +1,227 @@
+# extraction_backends.py
+"""
+Backends answering the extraction prompts built by views.py.
+
+A backend receives the Gemini-style content list (text and inline_data parts)
+and returns (response text, tokens used). Everything around the call - text
+layer, rendering, rate limiting, JSON parsing, scoring - stays the same, so
+the rest of the pipeline can be measured without a Gemini key:
+
+    - "gemini": the real API (default)
+    - "stub": HTTP calls to `manage.py run_extraction_stub`, a local server
+      with configurable latency and error rates
+    - "record": calls Gemini and stores every response under a directory
+    - "replay": serves responses stored by "record", never touches the network
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+
+class ExtractionBackend:
+    """Turns an extraction prompt into the model's text response"""
+
+    name = ""
+
+    def generate(self, content: list) -> tuple[str, int]:
+        """Return (response text, total tokens used, 0 when unknown)"""
+        raise NotImplementedError
+
+
+class GeminiBackend(ExtractionBackend):
+    name = "gemini"
+
+    def __init__(self, model_factory: Callable, timeout: float):
+        self.model_factory = model_factory
+        self.timeout = timeout
+
+    def generate(self, content: list) -> tuple[str, int]:
+        model = self.model_factory()
+        # The client's own retry is disabled, the rate limiter retries instead
+        response = model.generate_content(content, request_options={"retry": None, "timeout": self.timeout})
+
+        usage = getattr(response, "usage_metadata", None)
+        return response.text, getattr(usage, "total_token_count", 0) or 0
+
+
+class StubBackend(ExtractionBackend):
+    """Client of the local stub server (manage.py run_extraction_stub)"""
+
+    name = "stub"
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url.rstrip("/") + "/generate"
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests
+
+            session = self._local.session = requests.Session()
+        return session
+
+    def generate(self, content: list) -> tuple[str, int]:
+        response = self._session().post(self.url, json={"content": content}, timeout=self.timeout)
+
+        if response.status_code != 200:
+            from google.api_core import exceptions as api_exceptions
+
+            # Same exception types as the Gemini client so retries behave identically
+            raise api_exceptions.from_http_status(response.status_code, response.text[:200])
+
+        data = response.json()
+        return data["text"], data.get("total_tokens", 0)
+
+
+class InlineStubBackend(ExtractionBackend):
+    """stub_response() in-process, for benchmarks that should not measure HTTP"""
+
+    name = "inline"
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def generate(self, content: list) -> tuple[str, int]:
+        if self.latency:
+            time.sleep(self.latency)
+        return stub_response(content), 0
+
+
+class RecordBackend(ExtractionBackend):
+    """Calls another backend and stores each response as <directory>/<content key>.json"""
+
+    name = "record"
+
+    def __init__(self, backend: ExtractionBackend, directory: Path):
+        self.backend = backend
+        self.directory = Path(directory)
+
+    def generate(self, content: list) -> tuple[str, int]:
+        text, tokens = self.backend.generate(content)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{content_key(content)}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps({
+            "text": text,
+            "total_tokens": tokens,
+            "prompt": [part["text"][:200] for part in content if "text" in part],
+        }, ensure_ascii=False))
+        tmp_path.replace(path)
+
+        return text, tokens
+
+
+class ReplayBackend(ExtractionBackend):
+    """Serves responses captured by RecordBackend"""
+
+    name = "replay"
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def generate(self, content: list) -> tuple[str, int]:
+        key = content_key(content)
+        try:
+            data = json.loads((self.directory / f"{key}.json").read_text())
+        except FileNotFoundError:
+            raise ValueError(f"No recorded response for this prompt (key {key[:12]})")
+
+        return data["text"], data.get("total_tokens", 0)
+
+
+def content_key(content: list) -> str:
+    """Stable hash of a content list (text parts and image bytes)"""
+
+    digest = hashlib.sha256()
+    for part in content:
+        if "text" in part:
+            digest.update(b"text\0" + part["text"].encode("utf-8"))
+        else:
+            inline = part["inline_data"]
+            data = inline["data"]
+            digest.update(b"data\0" + inline["mime_type"].encode() + b"\0")
+            digest.update(data.encode() if isinstance(data, str) else data)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# STUB RESPONSES
+
+STUB_SKILLS = [
+    "Python", "Django", "JavaScript", "TypeScript", "React", "SQL", "PostgreSQL",
+    "Docker", "Kubernetes", "Git", "Linux", "AWS", "Java", "Spring", "Node.js",
+    "Gestion de projet", "Scrum", "Machine Learning", "Pandas", "REST API",
+]
+STUB_TITLES = [
+    "Développeur Full Stack", "Data Scientist", "Ingénieur DevOps",
+    "Développeur Backend", "Chef de projet IT", "Développeur Frontend",
+]
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+
+
+def stub_response(content: list) -> str:
+    """
+    Plausible extraction JSON for a prompt, deterministic for a given content.
+
+    Job prompts keep the skills named in the description; CV prompts reuse an
+    email found in the text layer so synthetic candidates dedupe like real ones.
+    """
+
+    key = content_key(content)
+    rng = random.Random(key)
+    prompt = content[0].get("text", "") if content else ""
+    text = "\n".join(part["text"] for part in content[1:] if "text" in part)
+
+    if "description de poste" in prompt:
+        mentioned = [skill for skill in STUB_SKILLS if skill.lower() in prompt.lower()]
+        return json.dumps({
+            "job_title": rng.choice(STUB_TITLES),
+            "job_competences": mentioned or rng.sample(STUB_SKILLS, 5),
+            "company_name": "",
+            "location": "",
+            "type_de_contrat": "",
+        }, ensure_ascii=False)
+
+    email = EMAIL_RE.search(text)
+    mentioned = [skill for skill in STUB_SKILLS if skill.lower() in text.lower()]
+
+    data = {
+        "identite": {
+            "nom": f"Candidat {key[:6]}",
+            "email": email.group(0) if email else f"candidat.{key[:12]}@example.com",
+            "telephone": f"+261 34 {rng.randint(10, 99)} {rng.randint(100, 999)} {rng.randint(10, 99)}",
+            "adresse": "Antananarivo",
+        },
+        "job_title": rng.choice(STUB_TITLES),
+        "competences": mentioned or rng.sample(STUB_SKILLS, rng.randint(4, 8)),
+        "resume_experience": f"{rng.randint(1, 12)} ans d'expérience en développement logiciel.",
+    }
+
+    # Models often wrap their JSON in a markdown fence, extract_json handles both
+    body = json.dumps(data, ensure_ascii=False, indent=2)
+    return f"```json\n{body}\n```" if rng.random() < 0.5 else body
+
+
+def create_backend(name: str, model_factory: Callable, timeout: float, stub_url: str, record_dir: Optional[Path]) -> ExtractionBackend:
+    """Build the backend selected by EXTRACTION_BACKEND"""
+
+    if name == "gemini":
+        return GeminiBackend(model_factory, timeout)
+    if name == "stub":
+        return StubBackend(stub_url, timeout)
+    if name == "record":
+        return RecordBackend(GeminiBackend(model_factory, timeout), record_dir)
+    if name == "replay":
+        return ReplayBackend(record_dir)
+
+    raise ValueError(f"Unknown extraction backend '{name}' (expected gemini, stub, record or replay)")
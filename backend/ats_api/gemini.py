@@ -0,0 +1,149 @@
+# gemini.py
+"""
+Process-wide Gemini client registry.
+
+`genai.GenerativeModel` objects are cheap, but each one resolves its client
+and connection lazily on first call. The registry builds the underlying
+GenerativeServiceClient(s) once per process with explicit connection
+settings and hands out ready-to-use models bound to them:
+
+    - "grpc" transport: `pool_size` gRPC channels, models are spread over them
+      round-robin; keep-alive pings stop idle channels from being dropped
+    - "rest" transport: one requests session with `pool_size` persistent HTTPS
+      connections and TCP keep-alive on every socket
+
+Models are cached per (model name, generation config, safety settings) and
+are safe to share between threads: each call only reads the model's
+settings and goes through the thread-safe client.
+"""
+
+import functools
+import itertools
+import json
+import socket
+import threading
+from typing import Optional
+
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+from google.ai.generativelanguage_v1beta.services.generative_service.transports import (
+    GenerativeServiceGrpcTransport,
+    GenerativeServiceRestTransport,
+)
+from requests.adapters import HTTPAdapter
+
+TRANSPORTS = ("grpc", "rest")
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets use TCP keep-alive"""
+
+    def __init__(self, keepalive_seconds: int, **kwargs):
+        self.socket_options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            self.socket_options += [
+                (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, keepalive_seconds),
+                (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(1, keepalive_seconds // 3)),
+            ]
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        from urllib3.connection import HTTPConnection
+
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class GeminiRegistry:
+    """Shared Gemini clients and models for one API key"""
+
+    def __init__(self, api_key: Optional[str], transport: str = "grpc", pool_size: int = 4, keepalive_seconds: int = 300):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown Gemini transport '{transport}' (expected one of: {', '.join(TRANSPORTS)})")
+
+        self.api_key = api_key
+        self.transport = transport
+        self.pool_size = max(1, pool_size)
+        self.keepalive_seconds = keepalive_seconds
+
+        self._lock = threading.Lock()
+        self._clients = None
+        self._models = {}
+
+    # Clients
+
+    def _grpc_channel(self, *args, options=(), **kwargs):
+        options = list(options) + [
+            ("grpc.keepalive_time_ms", self.keepalive_seconds * 1000),
+            ("grpc.keepalive_timeout_ms", 20000),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+            # Separate channels must not share one TCP connection
+            ("grpc.use_local_subchannel_pool", 1),
+        ]
+        return GenerativeServiceGrpcTransport.create_channel(*args, options=options, **kwargs)
+
+    def _rest_transport(self, **kwargs) -> GenerativeServiceRestTransport:
+        transport = GenerativeServiceRestTransport(**kwargs)
+        adapter = _KeepAliveAdapter(
+            self.keepalive_seconds,
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+        )
+        transport._session.mount("https://", adapter)
+        return transport
+
+    def _make_client(self, transport) -> glm.GenerativeServiceClient:
+        return glm.GenerativeServiceClient(
+            transport=transport,
+            client_options={"api_key": self.api_key} if self.api_key else None,
+        )
+
+    def _get_clients(self):
+        """Build the client pool on first use (caller holds the lock)"""
+
+        if self._clients is None:
+            if self.transport == "grpc":
+                transport = functools.partial(GenerativeServiceGrpcTransport, channel=self._grpc_channel)
+                clients = [self._make_client(transport) for _ in range(self.pool_size)]
+            else:
+                # requests sessions are thread-safe, one pooled session is enough
+                clients = [self._make_client(self._rest_transport)]
+
+            self._clients = clients
+        return self._clients
+
+    # Models
+
+    def get_model(self, model_name: str, generation_config: dict, safety_settings: dict) -> genai.GenerativeModel:
+        """Return a configured model bound to one of the pooled clients"""
+
+        key = (model_name, json.dumps(generation_config, sort_keys=True), repr(sorted(safety_settings.items())))
+
+        with self._lock:
+            models = self._models.get(key)
+
+            if models is None:
+                models = []
+                for client in self._get_clients():
+                    model = genai.GenerativeModel(
+                        model_name,
+                        generation_config=generation_config,
+                        safety_settings=safety_settings,
+                    )
+                    model._client = client
+                    models.append(model)
+
+                models = self._models[key] = itertools.cycle(models)
+
+            return next(models)
+
+    def close(self) -> None:
+        """Close every pooled connection (the next call reconnects)"""
+
+        with self._lock:
+            clients, self._clients = self._clients, None
+            self._models = {}
+
+        for client in clients or ():
+            client.transport.close()
@@ -0,0 +1,228 @@
+# ingestion.py
+"""
+Bulk offline CV ingestion (`manage.py ingest_cvs`).
+
+PDFs are read from a directory, a zip or a tar archive, extracted with the
+same Gemini pipeline as the API, and saved in chunks: one transaction, a few
+bulk queries and one checkpoint write per chunk instead of several queries
+per CV. Duplicate rules are those of save_cv_to_db:
+    - a byte-identical PDF (pdf_sha256) is never extracted again
+    - a CV with the same candidat, competences and experience is reused
+
+The checkpoint is a JSON-lines file with one line per finished PDF, written
+after its chunk is committed, so an interrupted run resumes with the first
+PDF that was not saved yet.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .models import Candidat, CV
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint statuses
+SAVED = "saved"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+
+
+# SOURCES
+
+def is_pdf_name(name: str) -> bool:
+    base = os.path.basename(name)
+    return name.lower().endswith(".pdf") and not base.startswith(".")
+
+
+def iter_pdfs(source: Path) -> Iterator[tuple[str, bytes]]:
+    """(name, bytes) of every PDF of a directory, zip or tar, in a stable order"""
+
+    source = Path(source)
+
+    if source.is_dir():
+        for path in sorted(source.rglob("*")):
+            if path.is_file() and is_pdf_name(path.name):
+                yield path.relative_to(source).as_posix(), path.read_bytes()
+
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in sorted(archive.infolist(), key=lambda info: info.filename):
+                if not info.is_dir() and is_pdf_name(info.filename):
+                    yield info.filename, archive.read(info)
+
+    elif tarfile.is_tarfile(source):
+        # Stream mode: members are read in archive order, compressed tars are never seeked
+        with tarfile.open(source, "r|*") as archive:
+            for member in archive:
+                if member.isfile() and is_pdf_name(member.name):
+                    yield member.name, archive.extractfile(member).read()
+
+    else:
+        raise ValueError(f"{source} is not a directory, zip or tar archive")
+
+
+def count_pdfs(source: Path) -> Optional[int]:
+    """Number of PDFs in the source, None when it cannot be known without reading it (tar)"""
+
+    source = Path(source)
+    if source.is_dir():
+        return sum(1 for path in source.rglob("*") if path.is_file() and is_pdf_name(path.name))
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            return sum(1 for info in archive.infolist() if not info.is_dir() and is_pdf_name(info.filename))
+    return None
+
+
+# CHECKPOINT
+
+class Checkpoint:
+    """Append-only record of the PDFs already handled by previous runs"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries = {}
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # last line cut short by a crash
+                    self.entries[entry["name"]] = entry
+
+    def is_done(self, name: str, retry_failed: bool = False) -> bool:
+        entry = self.entries.get(name)
+        if entry is None:
+            return False
+        return not (retry_failed and entry["status"] == FAILED)
+
+    def record(self, entries: list[dict]) -> None:
+        if not entries:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.entries[entry["name"]] = entry
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# BULK SAVE
+
+def pdf_bytes_sha256(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def stored_cv_ids(hashes: list[str]) -> dict[str, int]:
+    """CV id of every hash already stored"""
+
+    return dict(CV.objects.filter(pdf_sha256__in=hashes).values_list("pdf_sha256", "id"))
+
+
+def bulk_save_cvs(rows: list[tuple[str, bytes, str, dict]]) -> list[dict]:
+    """
+    Save extracted (name, pdf_bytes, sha256, cv_data) rows in one transaction.
+
+    Returns one checkpoint entry per row. Raises IntegrityError when a
+    concurrent writer (the API) stored one of the PDFs in the meantime; the
+    caller then saves the chunk row by row, and the PDF files written for the
+    rolled back chunk are deleted.
+    """
+
+    entries = []
+    valid = []
+    for name, pdf_bytes, sha, cv_data in rows:
+        email = cv_data.get("identite", {}).get("email", "").strip()
+        if email:
+            valid.append((name, pdf_bytes, sha, cv_data, email))
+        else:
+            entries.append({"name": name, "status": FAILED, "error": "Email is required to create or retrieve candidate"})
+
+    if not valid:
+        return entries
+
+    new_cvs = []
+    hash_updates = []
+    duplicates = []
+    try:
+        with transaction.atomic():
+            # Candidats: create the new emails, refresh the known ones (last CV of the chunk wins)
+            identities = {email: cv_data.get("identite", {}) for _, _, _, cv_data, email in valid}
+            candidats = Candidat.objects.in_bulk(list(identities), field_name="email")
+
+            for email, candidat in candidats.items():
+                identite = identities[email]
+                candidat.nom = identite.get("nom", candidat.nom)
+                candidat.telephone = identite.get("telephone", candidat.telephone)
+                candidat.localisation = identite.get("adresse", candidat.localisation)
+            Candidat.objects.bulk_update(list(candidats.values()), ["nom", "telephone", "localisation"], batch_size=500)
+
+            Candidat.objects.bulk_create([
+                Candidat(
+                    email=email,
+                    nom=identite.get("nom", ""),
+                    telephone=identite.get("telephone", ""),
+                    localisation=identite.get("adresse", ""),
+                )
+                for email, identite in identities.items() if email not in candidats
+            ], batch_size=500)
+            candidats = Candidat.objects.in_bulk(list(identities), field_name="email")
+
+            # CVs: same candidat + competences + experience counts as the same CV
+            known = {}
+            for cv_id, candidat_id, competences, experience, sha in CV.objects.filter(
+                candidat_id__in=[c.id for c in candidats.values()]
+            ).values_list("id", "candidat_id", "competences", "experience", "pdf_sha256"):
+                known[(candidat_id, competences, experience)] = (cv_id, sha)
+
+            for name, pdf_bytes, sha, cv_data, email in valid:
+                candidat = candidats[email]
+                competences = ", ".join(cv_data.get("competences", []))
+                experience = cv_data.get("resume_experience", "")
+                key = (candidat.id, competences, experience)
+
+                if key in known:
+                    cv_id, known_sha = known[key]
+                    if cv_id is not None and not known_sha:
+                        hash_updates.append(CV(id=cv_id, pdf_sha256=sha))
+                        known[key] = (cv_id, sha)
+                    duplicates.append((name, key))
+                    continue
+
+                cv = CV(
+                    candidat=candidat,
+                    experience=experience,
+                    competences=competences,
+                    pdf_sha256=sha,
+                    texte_brut=json.dumps(cv_data, ensure_ascii=False),
+                )
+                cv.source_pdf.save(os.path.basename(name), ContentFile(pdf_bytes), save=False)
+                new_cvs.append((name, cv))
+                known[key] = (None, sha)
+
+            CV.objects.bulk_update(hash_updates, ["pdf_sha256"], batch_size=500)
+            CV.objects.bulk_create([cv for _, cv in new_cvs], batch_size=500)
+    except Exception:
+        # Rolled back: the PDF files already written belong to no row
+        for _, cv in new_cvs:
+            cv.source_pdf.delete(save=False)
+        raise
+
+    # Ids by hash (bulk_create does not return them on every database)
+    ids = stored_cv_ids([cv.pdf_sha256 for _, cv in new_cvs] + [known[key][1] for _, key in duplicates])
+    entries += [{"name": name, "status": SAVED, "cv_id": ids.get(cv.pdf_sha256)} for name, cv in new_cvs]
+    entries += [{"name": name, "status": DUPLICATE, "cv_id": ids.get(known[key][1])} for name, key in duplicates]
+
+    return entries
@@ -0,0 +1,365 @@
+import json
+import platform
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from ats_api import views
+from ats_api.extraction_backends import InlineStubBackend
+from ats_api.models import Candidat, CV, JobOffer
+from ats_api.synthetic import (
+    messy_llm_outputs,
+    synthetic_cv,
+    synthetic_cv_pdf,
+    synthetic_job_description,
+)
+
+STAGES = ["render", "extract_json", "extract_cv", "similarity", "db", "list"]
+
+
+def summarize(samples: list[float]) -> dict:
+    """Latency distribution of a stage, in milliseconds"""
+
+    ms = np.asarray(samples) * 1000
+    return {
+        "n": len(ms),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "min_ms": round(float(ms.min()), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def measure(fn, iterations: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot stages of the evaluation pipeline on synthetic CVs with a stubbed LLM. "
+        "Runs against a throw-away test database, never the configured one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stages",
+            nargs="+",
+            choices=STAGES,
+            default=STAGES,
+            help="Stages to run (default: all)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Timed runs per case (default: 20)",
+        )
+        parser.add_argument(
+            "--rows",
+            nargs="+",
+            type=int,
+            default=[10000, 100000],
+            help="Table sizes for the list endpoints (default: 10000 100000)",
+        )
+        parser.add_argument(
+            "--list-iterations",
+            type=int,
+            default=5,
+            help="Timed runs per list endpoint case (default: 5)",
+        )
+        parser.add_argument(
+            "--llm-latency",
+            type=float,
+            default=0.0,
+            help="Seconds added to every stubbed LLM call (default: 0)",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write results as JSON to this file",
+        )
+        parser.add_argument(
+            "--compare",
+            help="Previous JSON results to compare p50 latencies against",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())["stages"]
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        self.iterations = options["iterations"]
+        self.results = {}
+
+        with tempfile.TemporaryDirectory(prefix="ats-bench-") as tmp:
+            setup_test_environment()
+            old_name = connection.settings_dict["NAME"]
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = str(Path(tmp) / "bench.sqlite3")
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+            backend = views._extraction_backend
+            views._extraction_backend = InlineStubBackend(options["llm_latency"])
+
+            try:
+                with override_settings(MEDIA_ROOT=str(Path(tmp) / "media")):
+                    for stage in STAGES:
+                        if stage in options["stages"]:
+                            self.stdout.write(f"== {stage}")
+                            getattr(self, f"bench_{stage}")(options)
+            finally:
+                views._extraction_backend = backend
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        report = {
+            "meta": {
+                "created_at": timezone.now().isoformat(),
+                "commit": self.git_commit(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "iterations": self.iterations,
+                "render_backend": views.resolve_render_backend(views.PDF_RENDER_BACKEND, pooled=views.RENDER_PROCESSES > 0),
+                "image_profile": views.CV_IMAGE_PROFILE,
+                "model": views.EMBEDDING_MODEL_ID,
+            },
+            "stages": self.results,
+        }
+
+        self.print_table(baseline)
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+    # Helpers
+
+    def record(self, name: str, samples: list[float]) -> None:
+        self.results[name] = summarize(samples)
+        stats = self.results[name]
+        self.stdout.write(f"  {name:<48} p50 {stats['p50_ms']:>10.2f} ms   p99 {stats['p99_ms']:>10.2f} ms")
+
+    def skip(self, name: str, reason: str) -> None:
+        self.results[name] = {"skipped": reason}
+        self.stdout.write(f"  {name:<48} skipped: {reason}")
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+            ).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def print_table(self, baseline) -> None:
+        self.stdout.write("")
+        self.stdout.write(f"{'stage':<48} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10}   vs baseline")
+
+        for name, stats in self.results.items():
+            if "skipped" in stats:
+                continue
+
+            delta = ""
+            previous = (baseline or {}).get(name, {})
+            if previous.get("p50_ms"):
+                change = (stats["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"] * 100
+                delta = f"{change:+.1f}%"
+
+            self.stdout.write(
+                f"{name:<48} {stats['p50_ms']:>10.2f} {stats['p90_ms']:>10.2f} {stats['p99_ms']:>10.2f}   {delta}"
+            )
+
+    # Stages
+
+    def bench_render(self, options):
+        for pages in (1, 2, 3):
+            scanned = synthetic_cv_pdf(pages, pages=pages, scanned=True)
+            digital = synthetic_cv_pdf(pages, pages=pages)
+
+            if pages == 1:
+                self.record("pdf_to_base64_image[scanned]", measure(
+                    lambda: views.pdf_to_base64_image(scanned), self.iterations
+                ))
+            self.record(f"pdf_to_base64_images[scanned {pages}p]", measure(
+                lambda: views.pdf_to_base64_images(scanned, max_pages=pages), self.iterations
+            ))
+            self.record(f"extract_pdf_text[digital {pages}p]", measure(
+                lambda: views.extract_pdf_text(digital, max_pages=pages), self.iterations
+            ))
+
+    def bench_extract_json(self, options):
+        names = ["clean", "fenced", "prose", "trailing_commas", "fancy_quotes", "separators_zwsp"]
+        outputs = [messy_llm_outputs(synthetic_cv(i)) for i in range(self.iterations)]
+
+        for shape, name in enumerate(names):
+            texts = iter([variants[shape] for variants in outputs] * 2)
+            self.record(f"extract_json[{name}]", measure(
+                lambda: views.extract_json(next(texts)), self.iterations
+            ))
+
+    def bench_extract_cv(self, options):
+        for scanned in (False, True):
+            label = "scanned" if scanned else "digital"
+            for pages in (1, 3):
+                pdf = synthetic_cv_pdf(pages, pages=pages, scanned=scanned)
+                self.record(f"gemini_extract_cv[{label} {pages}p, stub]", measure(
+                    lambda: views.gemini_extract_cv(pdf), self.iterations
+                ))
+
+    def bench_similarity(self, options):
+        try:
+            views.get_similarity_model()
+        except Exception as e:
+            self.skip("semantic_similarity", f"model unavailable: {e}")
+            return
+
+        job = synthetic_job_description(0)
+        counter = iter(range(10 ** 9))
+
+        def cv_text(index):
+            cv = synthetic_cv(index)
+            return cv["resume_experience"] + " " + " ".join(cv["competences"])
+
+        # Cold: never-seen texts, every call runs the model
+        self.record("semantic_similarity[cold]", measure(
+            lambda: views.semantic_similarity(cv_text(next(counter)) + f" #{time.perf_counter_ns()}", job),
+            self.iterations
+        ))
+        # Warm: both embeddings come from the TextEmbedding cache
+        self.record("semantic_similarity[cached]", measure(
+            lambda: views.semantic_similarity(cv_text(1), job), self.iterations
+        ))
+
+        for size in (20, 100):
+            self.record(f"semantic_similarity_batch[{size}, cold]", measure(
+                lambda: views.semantic_similarity_batch(
+                    [cv_text(i) + f" #{time.perf_counter_ns()}" for i in range(size)], job
+                ),
+                max(3, self.iterations // 4)
+            ))
+            texts = [cv_text(i) for i in range(size)]
+            self.record(f"semantic_similarity_batch[{size}, cached]", measure(
+                lambda: views.semantic_similarity_batch(texts, job), self.iterations
+            ))
+
+    def bench_db(self, options):
+        new_ids = iter(range(10 ** 6, 10 ** 9))
+        self.record("get_or_create_candidat[new]", measure(
+            lambda: views.get_or_create_candidat(synthetic_cv(next(new_ids))), self.iterations
+        ))
+        self.record("get_or_create_candidat[existing]", measure(
+            lambda: views.get_or_create_candidat(synthetic_cv(10 ** 6)), self.iterations
+        ))
+
+        def save_new_cv():
+            index = next(new_ids)
+            cv_data = synthetic_cv(index)
+            candidat = views.get_or_create_candidat(cv_data)
+            pdf = SimpleUploadedFile(f"cv_{index}.pdf", synthetic_cv_pdf(index), content_type="application/pdf")
+            views.save_cv_to_db(cv_data, pdf, candidat)
+
+        self.record("save_cv_to_db[new]", measure(save_new_cv, self.iterations))
+
+        index = 10 ** 6
+        cv_data = synthetic_cv(index)
+        candidat = views.get_or_create_candidat(cv_data)
+        pdf_bytes = synthetic_cv_pdf(index)
+
+        def save_same_cv():
+            pdf = SimpleUploadedFile(f"cv_{index}.pdf", pdf_bytes, content_type="application/pdf")
+            views.save_cv_to_db(cv_data, pdf, candidat)
+
+        self.record("save_cv_to_db[duplicate]", measure(save_same_cv, self.iterations))
+
+    def bench_list(self, options):
+        client = Client()
+        iterations = options["list_iterations"]
+
+        # Start from empty tables so the row counts are exact
+        CV.objects.all().delete()
+        Candidat.objects.all().delete()
+        JobOffer.objects.all().delete()
+
+        seeded = 0
+        for rows in sorted(options["rows"]):
+            started = time.perf_counter()
+            self.seed(seeded, rows)
+            seeded = rows
+            self.stdout.write(f"  seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+
+            target = synthetic_cv(rows // 2)["identite"]["email"]
+            cases = {
+                "candidats page 1": "/api/candidats/",
+                "candidats middle page": f"/api/candidats/?page={rows // 20}",
+                "candidats search email": f"/api/candidats/?search={target}",
+                "candidats search skill": "/api/candidats/?search=Kubernetes",
+                "job_offers page 1": "/api/job_offers/",
+                "job_offers last page": f"/api/job_offers/?page={rows // 8}",
+                "job_offers search": "/api/job_offers/?search=DevOps",
+            }
+
+            for name, url in cases.items():
+                response = client.get(url)
+                if response.status_code != 200:
+                    self.skip(f"{name} [{rows} rows]", f"HTTP {response.status_code}")
+                    continue
+
+                self.record(f"{name} [{rows} rows]", measure(lambda: client.get(url), iterations, warmup=0))
+
+    def seed(self, start: int, stop: int, chunk: int = 5000) -> None:
+        """Bulk insert candidats with one CV each and job offers, ids start..stop-1"""
+
+        for offset in range(start, stop, chunk):
+            indexes = range(offset, min(offset + chunk, stop))
+            cvs = [synthetic_cv(i) for i in indexes]
+
+            candidats = Candidat.objects.bulk_create([
+                Candidat(
+                    nom=cv["identite"]["nom"],
+                    email=cv["identite"]["email"],
+                    telephone=cv["identite"]["telephone"],
+                    localisation=cv["identite"]["adresse"],
+                )
+                for cv in cvs
+            ])
+            CV.objects.bulk_create([
+                CV(
+                    candidat=candidat,
+                    texte_brut=json.dumps(cv, ensure_ascii=False),
+                    experience=cv["resume_experience"],
+                    competences=", ".join(cv["competences"]),
+                    source_pdf=f"cvs/synthetic_{i}.pdf",
+                )
+                for i, cv, candidat in zip(indexes, cvs, candidats)
+            ])
+            JobOffer.objects.bulk_create([
+                JobOffer(
+                    title=cv["job_title"],
+                    description=synthetic_job_description(i),
+                    competences_requises=", ".join(cv["competences"]),
+                    fingerprint=f"synthetic-{i}",
+                )
+                for i, cv in zip(indexes, cvs)
+            ])
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ats_api.views import (
+    get_cv_index,
+    get_job_offer_index,
+    sync_cv_index,
+    sync_job_offer_index,
+)
+
+
+class Command(BaseCommand):
+    help = "Build or update the vector indexes used by /api/rank_candidats/ and /api/rank_job_offers/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop the existing indexes and re-embed every CV and job offer",
+        )
+
+    def handle(self, *args, **options):
+        for label, index, sync in (
+            ("CV", get_cv_index(), sync_cv_index),
+            ("Job offer", get_job_offer_index(), sync_job_offer_index),
+        ):
+            started = time.monotonic()
+
+            if options["rebuild"]:
+                index.reset()
+
+            index.refresh()
+            before = len(index)
+            sync()
+
+            self.stdout.write(
+                f"{label} index: {len(index)} vectors ({len(index) - before} added) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ats_api.rendering import IMAGE_PROFILES, get_encoding_stats
+from ats_api.views import pdf_to_base64_image
+
+
+class Command(BaseCommand):
+    help = "Render sample CVs with every image profile and report encoded size and timings"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="PDF files or directories of PDFs")
+        parser.add_argument(
+            "--profiles",
+            default=",".join(IMAGE_PROFILES),
+            help="Comma-separated profile names (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        pdf_paths = []
+        for path in map(Path, options["paths"]):
+            pdf_paths.extend(sorted(path.glob("*.pdf")) if path.is_dir() else [path])
+
+        if not pdf_paths:
+            raise CommandError("No PDF files found")
+
+        profiles = [name.strip() for name in options["profiles"].split(",") if name.strip()]
+        unknown = [name for name in profiles if name not in IMAGE_PROFILES]
+        if unknown:
+            raise CommandError(f"Unknown profile(s): {', '.join(unknown)}")
+
+        failures = 0
+        for pdf_path in pdf_paths:
+            pdf_bytes = pdf_path.read_bytes()
+            for name in profiles:
+                try:
+                    pdf_to_base64_image(pdf_bytes, page_num=0, profile_name=name)
+                except ValueError as e:
+                    failures += 1
+                    self.stderr.write(f"{pdf_path.name} [{name}]: {e}")
+
+        stats = get_encoding_stats()
+        self.stdout.write(f"{'profile':<10} {'pages':>6} {'avg KB':>9} {'render ms':>10} {'encode ms':>10}")
+        for name in profiles:
+            if name not in stats:
+                continue
+            s = stats[name]
+            self.stdout.write(
+                f"{name:<10} {s['pages']:>6} {s['avg_bytes'] / 1024:>9.1f} "
+                f"{s['avg_render_ms']:>10.1f} {s['avg_encode_ms']:>10.1f}"
+            )
+
+        if failures:
+            self.stderr.write(f"{failures} render(s) failed")
@@ -0,0 +1,240 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ats_api import views
+from ats_api.management.commands.benchmark_pipeline import measure, summarize
+from ats_api.similarity_backends import (
+    QUANTIZATION_TARGETS,
+    SIMILARITY_BACKENDS,
+    export_dir_for,
+    load_similarity_model,
+    quantized_file,
+)
+from ats_api.synthetic import synthetic_cv, synthetic_job_description
+
+
+def resident_memory() -> int:
+    """Resident set size of this process in bytes (0 where /proc is not available)"""
+
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * 4096
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a similarity model backend (e.g. onnx_int8) with the full-precision torch "
+        "reference on a fixed CV/job pair set: embedding agreement, score drift, ranking "
+        "overlap, encoding speed and model size. Fails when accuracy is below the thresholds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend",
+            default="onnx_int8",
+            choices=[name for name in SIMILARITY_BACKENDS if name != "torch"],
+            help="Backend compared with torch (default: onnx_int8)",
+        )
+        parser.add_argument(
+            "--quantization",
+            default=views.SIMILARITY_QUANTIZATION,
+            choices=QUANTIZATION_TARGETS,
+            help=f"Quantization target (default: {views.SIMILARITY_QUANTIZATION})",
+        )
+        parser.add_argument("--model", default=views.MODEL_NAME, help="Model name or local path (default: MODEL_NAME)")
+        parser.add_argument(
+            "--pairs",
+            type=int,
+            default=100,
+            help="Synthetic CV/job pairs (default: 100), ignored with --pairs-file",
+        )
+        parser.add_argument(
+            "--pairs-file",
+            help='JSON list of {"cv": text, "job": text} to compare on real data instead',
+        )
+        parser.add_argument("--iterations", type=int, default=5, help="Timed runs per measurement (default: 5)")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=views.EMBEDDING_BATCH_SIZE,
+            help=f"Encoding batch size (default: {views.EMBEDDING_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--min-cosine",
+            type=float,
+            default=0.99,
+            help="Lowest accepted cosine between reference and candidate embeddings (default: 0.99)",
+        )
+        parser.add_argument(
+            "--max-score-delta",
+            type=float,
+            default=1.0,
+            help="Highest accepted difference of a 0-100 match score (default: 1.0)",
+        )
+        parser.add_argument("--output", help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        cv_texts, job_texts = self.load_pairs(options)
+        texts = cv_texts + job_texts
+        self.stdout.write(f"{len(cv_texts)} CV/job pairs, model {options['model']}")
+
+        # Import cost is paid once, before the memory of each model load is measured
+        import sentence_transformers  # noqa: F401
+
+        models = {}
+        results = {}
+        for backend in ("torch", options["backend"]):
+            self.stdout.write(f"Loading {backend}...")
+            rss_before = resident_memory()
+            started = time.perf_counter()
+            model = load_similarity_model(
+                options["model"],
+                backend=backend,
+                quantization=options["quantization"],
+                export_dir=views.SIMILARITY_EXPORT_DIR,
+                token=views.HF_TOKEN,
+            )
+            load_s = time.perf_counter() - started
+            models[backend] = model
+
+            encode_all = lambda: model.encode(texts, batch_size=options["batch_size"], convert_to_numpy=True)
+            batch = summarize(measure(encode_all, options["iterations"]))
+            single = summarize(measure(lambda: model.encode(texts[:1], convert_to_numpy=True), options["iterations"] * 10))
+
+            results[backend] = {
+                "load_s": round(load_s, 2),
+                "rss_mb": round((resident_memory() - rss_before) / 2 ** 20, 1),
+                "weights_mb": self.weights_mb(model, backend, options),
+                "batch_p50_ms": batch["p50_ms"],
+                "texts_per_s": round(len(texts) / (batch["p50_ms"] / 1000), 1),
+                "single_p50_ms": single["p50_ms"],
+            }
+
+        reference = self.encode(models["torch"], cv_texts, job_texts, options)
+        candidate = self.encode(models[options["backend"]], cv_texts, job_texts, options)
+        accuracy = self.accuracy(reference, candidate)
+
+        self.report(results, accuracy, options)
+
+        report = {
+            "meta": {
+                "model": options["model"],
+                "backend": options["backend"],
+                "quantization": options["quantization"],
+                "pairs": len(cv_texts),
+                "batch_size": options["batch_size"],
+            },
+            "speed": results,
+            "accuracy": accuracy,
+        }
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        failures = []
+        if accuracy["cosine_min"] < options["min_cosine"]:
+            failures.append(f"embedding cosine {accuracy['cosine_min']:.4f} < {options['min_cosine']}")
+        if accuracy["score_delta_max"] > options["max_score_delta"]:
+            failures.append(f"score delta {accuracy['score_delta_max']:.2f} > {options['max_score_delta']}")
+        if failures:
+            raise CommandError(f"{options['backend']} is not accurate enough: {'; '.join(failures)}")
+
+    # Data
+
+    def load_pairs(self, options) -> tuple[list[str], list[str]]:
+        if options["pairs_file"]:
+            try:
+                pairs = json.loads(Path(options["pairs_file"]).read_text())
+                return [pair["cv"] for pair in pairs], [pair["job"] for pair in pairs]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                raise CommandError(f"Invalid pairs file: {e}")
+
+        # Same texts the pipeline scores: cv_similarity_text of an extraction vs a job description
+        count = options["pairs"]
+        return (
+            [views.cv_similarity_text(synthetic_cv(i)) for i in range(count)],
+            [synthetic_job_description(i) for i in range(count)],
+        )
+
+    def encode(self, model, cv_texts: list[str], job_texts: list[str], options) -> dict:
+        cvs = model.encode(cv_texts, batch_size=options["batch_size"], convert_to_numpy=True).astype(np.float32)
+        jobs = model.encode(job_texts, batch_size=options["batch_size"], convert_to_numpy=True).astype(np.float32)
+        return {"cvs": cvs, "jobs": jobs}
+
+    def weights_mb(self, model, backend: str, options) -> float:
+        if backend == "torch":
+            size = sum(p.numel() * p.element_size() for p in model.parameters())
+        else:
+            directory = export_dir_for(options["model"], views.SIMILARITY_EXPORT_DIR)
+            size = (directory / quantized_file(directory, options["quantization"])).stat().st_size
+        return round(size / 2 ** 20, 1)
+
+    # Accuracy
+
+    def accuracy(self, reference: dict, candidate: dict) -> dict:
+        ref = np.vstack([reference["cvs"], reference["jobs"]])
+        cand = np.vstack([candidate["cvs"], candidate["jobs"]])
+        cosines = np.diag(views.cos_sim(ref, cand))
+
+        # Pair scores as stored in Evaluation (0-100), every CV against every job
+        ref_scores = views.cos_sim(reference["cvs"], reference["jobs"])
+        cand_scores = views.cos_sim(candidate["cvs"], candidate["jobs"])
+        to_score = np.vectorize(views.normalize_similarity)
+        deltas = np.abs(to_score(ref_scores) - to_score(cand_scores))
+
+        # Ranking of the CVs for each job, as rank_candidats returns it
+        k = min(10, len(reference["cvs"]))
+        overlaps, top1 = [], []
+        for j in range(ref_scores.shape[1]):
+            ref_top = np.argsort(-ref_scores[:, j])[:k]
+            cand_top = np.argsort(-cand_scores[:, j])[:k]
+            overlaps.append(len(set(ref_top) & set(cand_top)) / k)
+            top1.append(ref_top[0] == cand_top[0])
+
+        return {
+            "cosine_mean": round(float(cosines.mean()), 5),
+            "cosine_min": round(float(cosines.min()), 5),
+            "score_delta_mean": round(float(deltas.mean()), 3),
+            "score_delta_max": round(float(deltas.max()), 3),
+            "spearman": round(spearman(ref_scores.ravel(), cand_scores.ravel()), 5),
+            f"top{k}_overlap": round(float(np.mean(overlaps)), 4),
+            "top1_agreement": round(float(np.mean(top1)), 4),
+        }
+
+    # Reporting
+
+    def report(self, results: dict, accuracy: dict, options) -> None:
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'backend':<10} {'load s':>8} {'weights MB':>11} {'RSS MB':>8} "
+            f"{'batch ms':>10} {'texts/s':>9} {'1 text ms':>10}"
+        )
+        for backend, r in results.items():
+            self.stdout.write(
+                f"{backend:<10} {r['load_s']:>8.2f} {r['weights_mb']:>11.1f} {r['rss_mb']:>8.1f} "
+                f"{r['batch_p50_ms']:>10.1f} {r['texts_per_s']:>9.1f} {r['single_p50_ms']:>10.2f}"
+            )
+
+        ref, cand = results["torch"], results[options["backend"]]
+        self.stdout.write(
+            f"Speed-up: x{ref['batch_p50_ms'] / cand['batch_p50_ms']:.2f} batch, "
+            f"x{ref['single_p50_ms'] / cand['single_p50_ms']:.2f} single text, "
+            f"weights x{ref['weights_mb'] / max(cand['weights_mb'], 0.1):.1f} smaller"
+        )
+
+        self.stdout.write("")
+        self.stdout.write("Accuracy vs torch:")
+        for name, value in accuracy.items():
+            self.stdout.write(f"  {name:<18} {value}")
@@ -0,0 +1,269 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from ats_api import views
+from ats_api.models import CV
+from ats_api.ingestion import (
+    DUPLICATE,
+    FAILED,
+    SAVED,
+    Checkpoint,
+    bulk_save_cvs,
+    count_pdfs,
+    iter_pdfs,
+    pdf_bytes_sha256,
+    stored_cv_ids,
+)
+from ats_api.management.commands.benchmark_pipeline import summarize
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a directory, zip or tar of CV PDFs: parallel extraction, chunked bulk inserts "
+        "and a checkpoint file, so an interrupted run resumes where it stopped"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory, .zip or .tar(.gz/.bz2/.xz) of PDFs")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=views.CV_EXTRACTION_WORKERS,
+            help=f"CVs extracted at the same time (default: {views.CV_EXTRACTION_WORKERS}); "
+                 "the Gemini rate limits (GEMINI_*_PER_MINUTE) still apply",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=200,
+            help="Extracted CVs saved per transaction and checkpoint write (default: 200)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (default: <source>.ingest.jsonl next to the source)",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Extract again the PDFs that failed in a previous run",
+        )
+        parser.add_argument("--limit", type=int, default=0, help="Stop after this many new PDFs (default: all)")
+        parser.add_argument(
+            "--progress-interval",
+            type=float,
+            default=10,
+            help="Seconds between progress lines (default: 10)",
+        )
+        parser.add_argument(
+            "--no-index",
+            action="store_true",
+            help="Do not embed each saved chunk into the CV vector index (the next ranking then encodes them)",
+        )
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if not source.exists():
+            raise CommandError(f"{source} does not exist")
+
+        checkpoint_path = Path(options["checkpoint"] or f"{source.resolve()}.ingest.jsonl")
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.chunk_size = max(1, options["chunk_size"])
+        self.retry_failed = options["retry_failed"]
+        self.index = not options["no_index"]
+
+        self.total = count_pdfs(source)
+        self.counts = {SAVED: 0, DUPLICATE: 0, FAILED: 0, "skipped": 0}
+        self.extract_times = []
+        self.buffer = []   # extracted rows waiting for the next bulk save
+        self.finished = []  # checkpoint entries of PDFs that need no save (failures, known hashes)
+        self.extracting = {}  # name -> hash of the PDFs submitted for extraction, until checkpointed
+        self.copies = {}  # hash -> names of byte copies waiting for the outcome of the first one
+
+        self.stdout.write(
+            f"Ingesting {source} ({self.total if self.total is not None else 'unknown number of'} PDFs, "
+            f"{len(self.checkpoint.entries)} in checkpoint {checkpoint_path})"
+        )
+
+        workers = max(1, options["workers"])
+        self.started = self.last_report = time.monotonic()
+        self.last_done = 0
+        self.interval = options["progress_interval"]
+
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest")
+        pending = {}
+        seen = set()  # hashes extracted or being extracted in this run (same PDF twice in the source)
+        submitted = 0
+
+        try:
+            for name, pdf_bytes in iter_pdfs(source):
+                if self.checkpoint.is_done(name, self.retry_failed):
+                    self.counts["skipped"] += 1
+                    continue
+                if options["limit"] and submitted >= options["limit"]:
+                    break
+
+                submitted += 1
+                self.submit(pool, pending, seen, name, pdf_bytes)
+
+                # Bounded read-ahead: at most two PDFs per worker held in memory
+                while len(pending) >= workers * 2:
+                    self.collect(pending)
+
+            while pending:
+                self.collect(pending)
+            self.flush()
+
+        except KeyboardInterrupt:
+            self.stdout.write("Interrupted, saving the CVs already extracted...")
+            for future in pending:
+                future.cancel()
+            for future, (name, pdf_bytes, sha, _) in list(pending.items()):
+                if future.done() and not future.cancelled():
+                    self.handle_result(future, name, pdf_bytes, sha)
+            self.flush()
+
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.report(final=True)
+
+    # Pipeline
+
+    def submit(self, pool, pending, seen, name, pdf_bytes) -> None:
+        if len(pdf_bytes) > views.MAX_FILE_SIZE:
+            self.finish({"name": name, "status": FAILED, "error": f"exceeds {views.MAX_FILE_SIZE // (1024 * 1024)}MB limit"})
+            return
+
+        sha = pdf_bytes_sha256(pdf_bytes)
+
+        # Byte-identical PDF already stored (previous import or API upload): nothing to extract
+        cv_id = stored_cv_ids([sha]).get(sha)
+        if cv_id is not None:
+            self.finish({"name": name, "status": DUPLICATE, "cv_id": cv_id})
+            return
+
+        # Copy of a PDF of this run not saved yet: checkpointed with the first one's outcome
+        if sha in seen:
+            self.copies.setdefault(sha, []).append(name)
+            return
+
+        seen.add(sha)
+        self.extracting[name] = sha
+        future = pool.submit(self.extract, pdf_bytes)
+        pending[future] = (name, pdf_bytes, sha, time.monotonic())
+
+    def extract(self, pdf_bytes: bytes) -> tuple[dict, float]:
+        started = time.perf_counter()
+        return views.gemini_extract_cv(pdf_bytes), time.perf_counter() - started
+
+    def collect(self, pending) -> None:
+        done, _ = wait(pending, timeout=self.interval, return_when=FIRST_COMPLETED)
+        for future in done:
+            name, pdf_bytes, sha, _ = pending.pop(future)
+            self.handle_result(future, name, pdf_bytes, sha)
+
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+        self.report()
+
+    def handle_result(self, future, name, pdf_bytes, sha) -> None:
+        try:
+            cv_data, elapsed = future.result()
+        except Exception as e:
+            self.finish({"name": name, "status": FAILED, "error": str(e)})
+            return
+
+        self.extract_times.append(elapsed)
+        self.buffer.append((name, pdf_bytes, sha, cv_data))
+
+    def finish(self, entry: dict) -> None:
+        self.finished.append(entry)
+        if len(self.finished) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Save the buffered CVs in one transaction, then checkpoint everything finished"""
+
+        rows, self.buffer = self.buffer, []
+        entries, self.finished = self.finished, []
+
+        if rows:
+            try:
+                entries += bulk_save_cvs(rows)
+            except IntegrityError:
+                # A concurrent upload stored one of these PDFs: save row by row with the API path
+                entries += [self.save_one(*row) for row in rows]
+
+        entries += self.copy_entries(entries)
+        self.checkpoint.record(entries)
+        for entry in entries:
+            self.counts[entry["status"]] += 1
+
+        saved_ids = [entry["cv_id"] for entry in entries if entry["status"] == SAVED and entry.get("cv_id")]
+        if self.index and saved_ids:
+            views.index_cvs(list(CV.objects.filter(id__in=saved_ids).only("id", "experience", "competences")))
+
+    def copy_entries(self, entries: list[dict]) -> list[dict]:
+        """Entries of the byte copies of the PDFs whose outcome is now known"""
+
+        copies = []
+        for entry in entries:
+            sha = self.extracting.pop(entry["name"], None)
+            for name in self.copies.pop(sha, []):
+                if entry["status"] == FAILED:
+                    # Failed like the original, so --retry-failed retries the copies as well
+                    copies.append({"name": name, "status": FAILED, "error": f"Same PDF as {entry['name']}: {entry['error']}"})
+                else:
+                    copies.append({"name": name, "status": DUPLICATE, "cv_id": entry.get("cv_id")})
+        return copies
+
+    def save_one(self, name, pdf_bytes, sha, cv_data) -> dict:
+        try:
+            cv = views.save_extracted_cv(ContentFile(pdf_bytes, name=Path(name).name), cv_data)
+        except Exception as e:
+            return {"name": name, "status": FAILED, "error": str(e)}
+        return {"name": name, "status": SAVED if cv.pdf_sha256 == sha else DUPLICATE, "cv_id": cv.id}
+
+    # Reporting
+
+    def report(self, final: bool = False) -> None:
+        now = time.monotonic()
+        if not final and now - self.last_report < self.interval:
+            return
+
+        done = self.counts[SAVED] + self.counts[DUPLICATE] + self.counts[FAILED]
+        elapsed = now - self.started
+        rate = done / elapsed if elapsed else 0.0
+        recent = (done - self.last_done) / (now - self.last_report) if now > self.last_report else 0.0
+        self.last_report, self.last_done = now, done
+
+        line = (
+            f"{'Done' if final else '  '} {elapsed:7.1f}s  {done} processed "
+            f"({self.counts[SAVED]} saved, {self.counts[DUPLICATE]} duplicates, {self.counts[FAILED]} failed, "
+            f"{self.counts['skipped']} skipped)  {rate:.2f} CV/s"
+        )
+        if not final:
+            line += f" (last {recent:.2f} CV/s)"
+
+        remaining = None
+        if self.total is not None:
+            remaining = self.total - done - self.counts["skipped"]
+        if not final and remaining and rate:
+            eta = remaining / rate
+            line += f"  ETA {eta / 60:.1f} min" if eta >= 120 else f"  ETA {eta:.0f}s"
+
+        self.stdout.write(line)
+
+        if final and self.extract_times:
+            stats = summarize(self.extract_times)
+            self.stdout.write(
+                f"Extraction per CV: p50 {stats['p50_ms'] / 1000:.2f}s, p90 {stats['p90_ms'] / 1000:.2f}s, "
+                f"max {stats['max_ms'] / 1000:.2f}s; Gemini limiter: {views._gemini_limiter.get_stats()}"
+            )
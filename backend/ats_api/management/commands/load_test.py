@@ -0,0 +1,288 @@
+import json
+import random
+import threading
+import time
+from pathlib import Path
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from ats_api.management.commands.benchmark_pipeline import summarize
+from ats_api.synthetic import SKILLS, LAST_NAMES, synthetic_cv_pdf, synthetic_job_description
+
+ENDPOINTS = ["upload", "candidats", "job_offers"]
+
+
+def parse_mix(value: str) -> dict:
+    """"upload=1,candidats=5,job_offers=3" -> {"upload": 1.0, ...}"""
+
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise CommandError(f"Unknown endpoint '{name}' in --mix (expected {', '.join(ENDPOINTS)})")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Invalid weight '{weight}' for '{name}' in --mix")
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server with concurrent mixed traffic and report throughput, "
+        "latency percentiles and error rates per endpoint. Start the server with "
+        "EXTRACTION_BACKEND=stub (and manage.py run_extraction_stub) so no Gemini quota is used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server base URL")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Simulated clients sending requests back to back (default: 10)",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=60,
+            help="Seconds to run (default: 60)",
+        )
+        parser.add_argument(
+            "--mix",
+            default="upload=1,candidats=5,job_offers=3",
+            help="Relative weight of each endpoint (default: upload=1,candidats=5,job_offers=3)",
+        )
+        parser.add_argument(
+            "--cvs-per-upload",
+            type=int,
+            default=3,
+            help="CVs attached to each upload request (default: 3)",
+        )
+        parser.add_argument(
+            "--cv-pool",
+            type=int,
+            default=200,
+            help="Distinct synthetic CVs; once used, uploads hit the duplicate path (default: 200)",
+        )
+        parser.add_argument(
+            "--scanned-ratio",
+            type=float,
+            default=0.3,
+            help="Share of image-only CVs going through rasterization (default: 0.3)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=300,
+            help="Per-request timeout in seconds (default: 300)",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=None,
+            help="Synthetic data seed (default: random, so CVs are new on every run)",
+        )
+        parser.add_argument(
+            "--allow-gemini",
+            action="store_true",
+            help="Run even if the server reports the real Gemini extraction backend",
+        )
+        parser.add_argument("--output", help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        self.base_url = options["url"].rstrip("/")
+        self.timeout = options["timeout"]
+        mix = parse_mix(options["mix"])
+
+        self.check_server(options["allow_gemini"])
+
+        seed = options["seed"] if options["seed"] is not None else random.randrange(10 ** 6)
+        self.stdout.write(f"Generating {options['cv_pool']} synthetic CVs (seed {seed})...")
+        self.cv_pool = self.build_cv_pool(seed, options["cv_pool"], options["scanned_ratio"])
+        self.job_pool = [synthetic_job_description(seed + i) for i in range(20)]
+        self.cvs_per_upload = options["cvs_per_upload"]
+
+        self.samples = {name: [] for name in mix}
+        self.errors = {name: {} for name in mix}
+        self.lock = threading.Lock()
+        self.cv_cursor = 0
+        # Page counts learned from the list responses, so clients only ask for existing pages
+        self.pages = {"candidats": 1, "job_offers": 1}
+
+        deadline = time.monotonic() + options["duration"]
+        names, weights = list(mix), list(mix.values())
+
+        def client(number: int):
+            rng = random.Random(seed * 1000 + number)
+            session = requests.Session()
+            while time.monotonic() < deadline:
+                endpoint = rng.choices(names, weights)[0]
+                self.send(session, endpoint, rng)
+
+        self.stdout.write(
+            f"Running {options['concurrency']} clients for {options['duration']:g}s against {self.base_url} "
+            f"(mix {options['mix']})"
+        )
+        started = time.monotonic()
+        threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(options["concurrency"])]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while time.monotonic() < deadline:
+                time.sleep(min(5, max(0.1, deadline - time.monotonic())))
+                self.progress(time.monotonic() - started)
+
+            self.stdout.write("Waiting for in-flight requests...")
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Interrupted, reporting what completed so far")
+            deadline = 0
+
+        elapsed = time.monotonic() - started
+        report = self.report(elapsed, options)
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+    # Setup
+
+    def check_server(self, allow_gemini: bool) -> None:
+        try:
+            response = requests.get(f"{self.base_url}/api/health/", timeout=30)
+            checks = response.json().get("checks", {})
+        except (requests.RequestException, ValueError) as e:
+            raise CommandError(f"Server not reachable at {self.base_url}: {e}")
+
+        backend = checks.get("extraction_backend", "gemini")
+        self.stdout.write(f"Server extraction backend: {backend}")
+
+        if backend in ("gemini", "record") and not allow_gemini:
+            raise CommandError(
+                "The server calls the real Gemini API. Restart it with EXTRACTION_BACKEND=stub "
+                "or pass --allow-gemini to spend quota on purpose."
+            )
+
+    def build_cv_pool(self, seed: int, size: int, scanned_ratio: float) -> list[tuple[str, bytes]]:
+        rng = random.Random(seed)
+        pool = []
+        for i in range(size):
+            index = seed * 10 ** 4 + i
+            scanned = rng.random() < scanned_ratio
+            pdf = synthetic_cv_pdf(index, pages=rng.randint(1, 3), scanned=scanned)
+            pool.append((f"cv_{index}.pdf", pdf))
+        return pool
+
+    # Requests
+
+    def next_cvs(self) -> list[tuple[str, bytes]]:
+        with self.lock:
+            start = self.cv_cursor
+            self.cv_cursor += self.cvs_per_upload
+        return [self.cv_pool[(start + i) % len(self.cv_pool)] for i in range(self.cvs_per_upload)]
+
+    def send(self, session: requests.Session, endpoint: str, rng: random.Random) -> None:
+        started = time.perf_counter()
+        error = None
+
+        try:
+            if endpoint == "upload":
+                files = [("resumes", (name, pdf, "application/pdf")) for name, pdf in self.next_cvs()]
+                response = session.post(
+                    f"{self.base_url}/api/upload_and_evaluate/",
+                    data={"job_description": rng.choice(self.job_pool)},
+                    files=files,
+                    timeout=self.timeout,
+                )
+            elif endpoint == "candidats":
+                if rng.random() < 0.2:
+                    params = {"search": rng.choice(SKILLS + LAST_NAMES)}
+                else:
+                    params = {"page": rng.randint(1, self.pages["candidats"])}
+                response = session.get(f"{self.base_url}/api/candidats/", params=params, timeout=self.timeout)
+                self.learn_pages(endpoint, response, page_size=10)
+            else:
+                if rng.random() < 0.2:
+                    params = {"search": "Developpeur"}
+                else:
+                    params = {"page": rng.randint(1, self.pages["job_offers"])}
+                response = session.get(f"{self.base_url}/api/job_offers/", params=params, timeout=self.timeout)
+                self.learn_pages(endpoint, response, page_size=8)
+
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}"
+        except requests.Timeout:
+            error = "timeout"
+        except requests.RequestException as e:
+            error = type(e).__name__
+
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.samples[endpoint].append(elapsed)
+            if error:
+                self.errors[endpoint][error] = self.errors[endpoint].get(error, 0) + 1
+
+    def learn_pages(self, endpoint: str, response, page_size: int) -> None:
+        if response.status_code != 200:
+            return
+        try:
+            data = response.json()
+        except ValueError:
+            return
+        if data.get("paginated") and data.get("count"):
+            self.pages[endpoint] = max(1, -(-data["count"] // page_size))
+
+    # Reporting
+
+    def progress(self, elapsed: float) -> None:
+        with self.lock:
+            done = sum(len(samples) for samples in self.samples.values())
+            failed = sum(sum(errors.values()) for errors in self.errors.values())
+        self.stdout.write(f"  {elapsed:6.1f}s  {done} requests  {failed} errors  {done / max(elapsed, 1e-9):.1f} req/s")
+
+    def report(self, elapsed: float, options: dict) -> dict:
+        endpoints = {}
+
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'endpoint':<12} {'requests':>9} {'req/s':>8} {'errors':>8} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}"
+        )
+
+        for name, samples in self.samples.items():
+            errors = self.errors[name]
+            failed = sum(errors.values())
+            result = {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / elapsed, 3),
+                "errors": failed,
+                "error_rate": round(failed / len(samples), 4) if samples else 0.0,
+                "error_kinds": errors,
+            }
+            if samples:
+                result.update(summarize(samples))
+                self.stdout.write(
+                    f"{name:<12} {len(samples):>9} {result['throughput_rps']:>8.2f} {failed:>8} "
+                    f"{result['p50_ms']:>10.1f} {result['p90_ms']:>10.1f} {result['p99_ms']:>10.1f} {result['max_ms']:>10.1f}"
+                )
+            endpoints[name] = result
+
+        total = sum(len(samples) for samples in self.samples.values())
+        self.stdout.write(f"Total: {total} requests in {elapsed:.1f}s ({total / elapsed:.2f} req/s)")
+
+        return {
+            "meta": {
+                "url": self.base_url,
+                "concurrency": options["concurrency"],
+                "duration_s": round(elapsed, 2),
+                "mix": options["mix"],
+                "cvs_per_upload": options["cvs_per_upload"],
+                "cv_pool": options["cv_pool"],
+                "scanned_ratio": options["scanned_ratio"],
+            },
+            "endpoints": endpoints,
+        }
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from ats_api import views
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute stored evaluation scores produced by another model or scoring version "
+        "(SCORE_VERSION), in chunks with bulk updates; safe to interrupt and run again"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=views.RESCORE_CHUNK_SIZE,
+            help=f"Evaluations loaded, encoded and updated at a time (default: {views.RESCORE_CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=max(views.EMBEDDING_BATCH_SIZE, 128),
+            help=f"Texts per encode() call, larger than the API's (default: {max(views.EMBEDDING_BATCH_SIZE, 128)})",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute every score, including those already at the current version",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how much scores would change without writing them",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Score version: {views.SCORE_VERSION}")
+
+        progress = None
+        for progress in views.rescore_evaluations(
+            chunk_size=max(1, options["chunk_size"]),
+            batch_size=max(1, options["batch_size"]),
+            force=options["force"],
+            dry_run=options["dry_run"],
+        ):
+            self.stdout.write(
+                f"  {progress['done']}/{progress['total']} evaluations  {progress['changed']} changed  "
+                f"mean |delta| {progress['mean_abs_delta']}  {progress['per_second']}/s"
+            )
+
+        if progress is None:
+            self.stdout.write("Every evaluation is already scored with this version")
+            return
+
+        self.stdout.write(
+            f"{'Would rescore' if options['dry_run'] else 'Rescored'} {progress['done']} evaluations in "
+            f"{progress['elapsed_s']}s: {progress['changed']} changed, "
+            f"max |delta| {progress['max_abs_delta']} points"
+        )
@@ -0,0 +1,84 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ats_api.batches import claim_next_batch, process_batch, requeue_stale_batches
+from ats_api.models import EvaluationBatch
+
+
+class Command(BaseCommand):
+    help = "Process evaluation batches submitted through /api/batches/"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when no batch is pending (default: 2)",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            default=30,
+            help="Requeue running batches without progress for more than N minutes (default: 30)",
+        )
+        parser.add_argument(
+            "--requeue-interval",
+            type=float,
+            default=60,
+            help="Seconds between two checks for stale batches while polling (default: 60)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling forever",
+        )
+
+    def requeue(self, stale_after: timedelta) -> None:
+        requeued = requeue_stale_batches(stale_after)
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale batch(es)")
+        self.last_requeue = time.monotonic()
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(minutes=options["stale_after"])
+        self.requeue(stale_after)
+
+        self.stdout.write("Batch worker started")
+
+        try:
+            while True:
+                # Another worker may have died mid-batch since startup
+                if time.monotonic() - self.last_requeue >= options["requeue_interval"]:
+                    self.requeue(stale_after)
+
+                batch = claim_next_batch()
+
+                if batch is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                self.stdout.write(f"Processing batch {batch.id} ({batch.items.count()} CVs)")
+                started = time.monotonic()
+
+                try:
+                    process_batch(batch)
+                except Exception as e:
+                    EvaluationBatch.objects.filter(id=batch.id).update(
+                        status=EvaluationBatch.FAILED,
+                        error=f"Worker error: {str(e)}",
+                        finished_at=timezone.now(),
+                    )
+                    self.stderr.write(f"Batch {batch.id} failed: {e}")
+                    continue
+
+                batch.refresh_from_db()
+                self.stdout.write(
+                    f"Batch {batch.id} {batch.status} in {time.monotonic() - started:.1f}s"
+                )
+        except KeyboardInterrupt:
+            self.stdout.write("Batch worker stopped")
@@ -0,0 +1,88 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ats_api import views
+from ats_api.embedding_server import EmbeddingServer
+from ats_api.similarity_backends import load_similarity_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Hold the similarity model in one process and encode for every web worker over a Unix "
+        "socket, batching concurrent requests (workers use it when EMBEDDING_SERVER_SOCKET is set)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--socket",
+            default=views.EMBEDDING_SERVER_SOCKET,
+            help="Unix socket path (default: EMBEDDING_SERVER_SOCKET)",
+        )
+        parser.add_argument(
+            "--max-batch",
+            type=int,
+            default=64,
+            help="Most texts merged into one forward pass (default: 64)",
+        )
+        parser.add_argument(
+            "--max-wait-ms",
+            type=float,
+            default=5,
+            help="How long the first request of a batch waits for others, in ms (default: 5)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=views.EMBEDDING_BATCH_SIZE,
+            help=f"encode() batch size inside a pass (default: {views.EMBEDDING_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--stats-interval",
+            type=float,
+            default=60,
+            help="Seconds between batching stats lines, 0 to disable (default: 60)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["socket"]:
+            raise CommandError("No socket path: pass --socket or set EMBEDDING_SERVER_SOCKET")
+
+        server = EmbeddingServer(
+            options["socket"],
+            lambda: load_similarity_model(
+                views.MODEL_NAME,
+                backend=views.SIMILARITY_BACKEND,
+                quantization=views.SIMILARITY_QUANTIZATION,
+                export_dir=views.SIMILARITY_EXPORT_DIR,
+                token=views.HF_TOKEN,
+            ),
+            views.EMBEDDING_MODEL_ID,
+            batch_size=options["batch_size"],
+            max_batch_texts=options["max_batch"],
+            max_wait=options["max_wait_ms"] / 1000,
+        )
+        self.stdout.write(
+            f"Embedding server for {views.EMBEDDING_MODEL_ID} listening on {options['socket']} "
+            f"(batches of up to {options['max_batch']} texts, {options['max_wait_ms']:g} ms wait)"
+        )
+
+        stop = threading.Event()
+        if options["stats_interval"] > 0:
+            def report():
+                while not stop.wait(options["stats_interval"]):
+                    stats = server.batcher.get_stats()
+                    self.stdout.write(
+                        f"model {server.model_status()}, {stats['requests']} requests, {stats['texts']} texts "
+                        f"in {stats['batches']} batches ({stats['avg_requests_per_batch']} requests/batch)"
+                    )
+
+            threading.Thread(target=report, daemon=True).start()
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Embedding server stopped")
+        finally:
+            stop.set()
+            server.server_close()
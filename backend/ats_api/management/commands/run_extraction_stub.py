@@ -0,0 +1,118 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from ats_api.extraction_backends import stub_response
+
+
+class Command(BaseCommand):
+    help = "Serve fake extraction responses for EXTRACTION_BACKEND=stub (load tests, benchmarks, CI)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=1.5,
+            help="Mean response time in seconds (default: 1.5)",
+        )
+        parser.add_argument(
+            "--jitter",
+            type=float,
+            default=0.5,
+            help="Standard deviation of the response time in seconds (default: 0.5)",
+        )
+        parser.add_argument(
+            "--rate-limit-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with 429 (default: 0)",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with 503 (default: 0)",
+        )
+        parser.add_argument(
+            "--max-concurrency",
+            type=int,
+            default=0,
+            help="Answer 429 when more requests are in flight (default: 0, unlimited)",
+        )
+
+    def handle(self, *args, **options):
+        stdout = self.stdout
+        state = {"in_flight": 0, "served": 0}
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+                with lock:
+                    state["in_flight"] += 1
+                try:
+                    status, payload = respond(body)
+                finally:
+                    with lock:
+                        state["in_flight"] -= 1
+
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        def respond(body: bytes):
+            limit = options["max_concurrency"]
+            if limit and state["in_flight"] > limit:
+                return 429, {"error": "Too many concurrent requests"}
+
+            time.sleep(max(0.0, random.gauss(options["latency"], options["jitter"])))
+
+            roll = random.random()
+            if roll < options["rate_limit_rate"]:
+                return 429, {"error": "Resource has been exhausted (stub)"}
+            if roll < options["rate_limit_rate"] + options["error_rate"]:
+                return 503, {"error": "Service unavailable (stub)"}
+
+            try:
+                content = json.loads(body)["content"]
+            except (ValueError, KeyError):
+                return 400, {"error": "Expected {\"content\": [...]}"}
+
+            text = stub_response(content)
+            with lock:
+                state["served"] += 1
+                served = state["served"]
+            if served % 100 == 0:
+                stdout.write(f"{served} responses served")
+
+            return 200, {"text": text, "total_tokens": len(body) // 4 + len(text) // 4}
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), Handler)
+        server.daemon_threads = True
+        self.stdout.write(
+            f"Extraction stub listening on http://{options['host']}:{options['port']} "
+            f"(latency {options['latency']}s ± {options['jitter']}s, "
+            f"429 rate {options['rate_limit_rate']}, 503 rate {options['error_rate']})"
+        )
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Extraction stub stopped")
+        finally:
+            server.server_close()
@@ -0,0 +1,232 @@
+# metrics.py
+"""
+Stage timers, counters and histograms for the evaluation pipeline.
+
+`timed("stage")` measures a block of code twice over:
+    - into the process-wide `ats_stage_duration_seconds` histogram, exported
+      in Prometheus text format by /api/metrics/
+    - into the timing collector of the current request (if any), which
+      ServerTimingMiddleware turns into a `Server-Timing` response header
+
+The collector lives in a context variable; worker threads see it when their
+task is submitted through `run_in_context`. Metrics are kept per process, so
+with several WSGI workers each scrape reflects the worker that answered it.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: tuple, extra: str = "") -> str:
+        parts = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{self._labels(key)} {_format(value)}" for key, value in sorted(values.items())]
+
+
+class Gauge(_Metric):
+    """Value read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name} {_format(self.callback())}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            bounds = [_format(bound) for bound in self.buckets] + ["+Inf"]
+            for bound, bucket_count in zip(bounds, counts + [count]):
+                le = 'le="' + bound + '"'
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {bucket_count}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render_metrics() -> str:
+    """Every registered metric in Prometheus text exposition format"""
+
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# PIPELINE METRICS
+
+STAGE_SECONDS = Histogram(
+    "ats_stage_duration_seconds",
+    "Time spent in a pipeline stage",
+    ("stage",),
+)
+REQUEST_SECONDS = Histogram(
+    "ats_http_request_duration_seconds",
+    "API request latency until the response is returned",
+    ("endpoint", "method", "status"),
+)
+GEMINI_CALLS = Counter(
+    "ats_gemini_calls_total",
+    "Extraction calls by kind (job, cv) and outcome (ok, error)",
+    ("kind", "outcome"),
+)
+CACHE_LOOKUPS = Counter(
+    "ats_cache_lookups_total",
+    "Cache lookups by cache (job_extraction, embedding, cv_extraction) and result (hit, miss)",
+    ("cache", "result"),
+)
+PAGES_RENDERED = Counter(
+    "ats_pdf_pages_rendered_total",
+    "PDF pages rasterized and encoded for the vision call",
+    ("profile",),
+)
+CV_EXTRACTIONS = Counter(
+    "ats_cv_extractions_total",
+    "CVs sent to the model by input path (text_layer, vision)",
+    ("path",),
+)
+
+
+# REQUEST TIMING
+
+class TimingCollector:
+    """Stage durations of one request (shared by its worker threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            total, count = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, count + 1)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one metric per stage, summed over calls"""
+
+        with self._lock:
+            stages = dict(self.stages)
+        return ", ".join(
+            f'{stage};dur={total * 1000:.1f};desc="{count} call{"s" if count > 1 else ""}"'
+            for stage, (total, count) in stages.items()
+        )
+
+
+_collector: contextvars.ContextVar[Optional[TimingCollector]] = contextvars.ContextVar("ats_timing", default=None)
+
+
+def start_collector() -> tuple:
+    collector = TimingCollector()
+    return collector, _collector.set(collector)
+
+
+def stop_collector(token) -> None:
+    _collector.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    collector = _collector.get()
+    if collector is not None:
+        collector.add(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def run_in_context(fn: Callable) -> Callable:
+    """Wrap fn so it runs with the caller's context (request collector) in a worker thread"""
+
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
+
+
+def time_queries(execute, sql, params, many, context):
+    """connection.execute_wrapper hook: every SQL query counts as the "db" stage"""
+
+    with timed("db"):
+        return execute(sql, params, many, context)
@@ -0,0 +1,41 @@
+# middleware.py
+"""
+Request timing middleware.
+
+Every request gets a timing collector (see metrics.py). When the response is
+returned, its stage durations and the total time are added as a
+`Server-Timing` header and the latency is observed in the
+`ats_http_request_duration_seconds` histogram. For streamed (SSE) responses
+only the work done before the first event is included.
+"""
+
+import time
+
+from .metrics import REQUEST_SECONDS, start_collector, stop_collector
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector, token = start_collector()
+        started = time.perf_counter()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_collector(token)
+
+        elapsed = time.perf_counter() - started
+
+        # Route patterns keep the label set small (no ids in the label)
+        match = request.resolver_match
+        endpoint = match.route if match else "unmatched"
+        REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+
+        timings = collector.server_timing()
+        total = f"total;dur={elapsed * 1000:.1f}"
+        response["Server-Timing"] = f"{timings}, {total}" if timings else total
+
+        return response
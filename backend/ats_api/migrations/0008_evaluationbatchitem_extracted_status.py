@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats_api', '0007_evaluationbatch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evaluationbatchitem',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('extracted', 'Extracted'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:08
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_pdf_sha256(apps, schema_editor):
+    """Hash the stored PDFs of existing CVs (first CV wins for identical files)"""
+
+    CV = apps.get_model("ats_api", "CV")
+    seen = set()
+
+    for cv in CV.objects.filter(pdf_sha256__isnull=True).order_by("id").iterator():
+        if not cv.source_pdf:
+            continue
+
+        try:
+            digest = hashlib.sha256()
+            with cv.source_pdf.open("rb") as f:
+                for chunk in f.chunks():
+                    digest.update(chunk)
+        except (OSError, ValueError):
+            continue  # file missing from MEDIA_ROOT
+
+        pdf_hash = digest.hexdigest()
+        if pdf_hash in seen:
+            continue
+
+        seen.add(pdf_hash)
+        CV.objects.filter(id=cv.id).update(pdf_sha256=pdf_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats_api', '0009_textembedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cv',
+            name='pdf_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_pdf_sha256, migrations.RunPython.noop),
+    ]
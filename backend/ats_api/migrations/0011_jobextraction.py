@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats_api', '0010_cv_pdf_sha256'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobExtraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('job_data', models.TextField()),
+                ('extracted_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='evaluationbatch',
+            name='refresh_job',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats_api', '0011_jobextraction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluation',
+            name='score_version',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats_api', '0012_evaluation_score_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluationbatch',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -13,6 +13,7 @@ class CV(models.Model):
     experience = models.TextField()
     competences = models.TextField()
     source_pdf = models.FileField(upload_to="cvs/")
+    pdf_sha256 = models.CharField(max_length=64, null=True, blank=True, unique=True)
 
 
 class JobOffer(models.Model):
@@ -31,3 +32,66 @@ class Evaluation(models.Model):
     score = models.FloatField()
     explanation = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Model + scoring formula that produced score (views.SCORE_VERSION), "" before it was recorded
+    score_version = models.CharField(max_length=255, blank=True, default="", db_index=True)
+
+
+class EvaluationBatch(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    job_description = models.TextField()
+    refresh_job = models.BooleanField(default=False)
+    job_offer = models.ForeignKey(JobOffer, on_delete=models.SET_NULL, null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed by the worker as items finish: a running batch without progress is requeued
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+
+class EvaluationBatchItem(models.Model):
+    PENDING = "pending"
+    EXTRACTED = "extracted"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (EXTRACTED, "Extracted"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    batch = models.ForeignKey(EvaluationBatch, on_delete=models.CASCADE, related_name="items")
+    filename = models.CharField(max_length=255)
+    source_pdf = models.FileField(upload_to="batches/", blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(null=True, blank=True)
+    evaluation = models.ForeignKey(Evaluation, on_delete=models.SET_NULL, null=True, blank=True)
+    result = models.TextField(null=True, blank=True)
+
+
+class TextEmbedding(models.Model):
+    # sha256 of model name + text, so a model change never hits stale vectors
+    key = models.CharField(max_length=64, unique=True)
+    model_name = models.CharField(max_length=255)
+    dimension = models.PositiveIntegerField()
+    vector = models.BinaryField()  # float32, little-endian
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class JobExtraction(models.Model):
+    # sha256 of the normalized job description sent to Gemini
+    key = models.CharField(max_length=64, unique=True)
+    job_data = models.TextField()
+    extracted_at = models.DateTimeField(db_index=True)
@@ -0,0 +1,231 @@
+# ratelimit.py
+"""
+Client-side rate limiting and retries for the Gemini API.
+
+Three pieces, combined by RateLimiter.call():
+    - TokenBucket: requests/min and tokens/min budgets, callers block until
+      their request fits instead of being rejected by the API
+    - AdaptiveConcurrency: AIMD limit on in-flight calls, halved on a 429
+      (once per overload: 429s of calls started before the last decrease are
+      ignored) and grown back by one slot per window of successful calls
+    - jittered exponential backoff ("full jitter") on quota and 5xx errors
+
+All state is process-wide and thread-safe, so every extraction thread of
+every batch running in the process shares the same budget.
+"""
+
+import functools
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def api_errors() -> tuple[tuple, tuple]:
+    """
+    (throttle errors, retryable errors). Quota errors shrink the concurrency
+    limit, the others are only retried. google.api_core is imported on the
+    first call, not when the web process starts.
+    """
+
+    from google.api_core import exceptions as api_exceptions
+
+    throttle = (
+        api_exceptions.ResourceExhausted,
+        api_exceptions.TooManyRequests,
+    )
+    return throttle, throttle + (
+        api_exceptions.InternalServerError,
+        api_exceptions.BadGateway,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.GatewayTimeout,
+        api_exceptions.DeadlineExceeded,
+    )
+
+
+class TokenBucket:
+    """Refills `per_minute` units every minute, holds at most one minute of budget"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take `amount` units, sleeping until they are available. Returns the time waited."""
+
+        if self.capacity <= 0:
+            return 0.0
+
+        # A request larger than the whole budget waits for a full bucket
+        amount = min(amount, self.capacity)
+        waited = 0.0
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) units once the real cost is known"""
+
+        if self.capacity <= 0:
+            return
+
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+
+class AdaptiveConcurrency:
+    """In-flight call limit between 1 and `maximum`, halved on throttling (AIMD)"""
+
+    def __init__(self, maximum: int):
+        self.maximum = max(1, maximum)
+        self.limit = float(self.maximum)
+        self._in_flight = 0
+        self._decreases = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> int:
+        """Wait for a free slot, return the decrease count to hand back to release()"""
+
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+            return self._decreases
+
+    def release(self, epoch: int, throttled: bool = False) -> None:
+        with self._condition:
+            self._in_flight -= 1
+
+            if throttled:
+                # A burst of concurrent 429s is one overload: only the first call
+                # started after the last decrease halves the limit again
+                if epoch == self._decreases:
+                    self.limit = max(1.0, self.limit / 2)
+                    self._decreases += 1
+            else:
+                # +1 slot after `limit` successful calls
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+            self._condition.notify_all()
+
+
+class RateLimiter:
+    """Token buckets + adaptive concurrency + retries around one API call"""
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "throttled": 0, "failed": 0, "wait_seconds": 0.0}
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential delay before retry number `attempt` (0-based)"""
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn: Callable, estimated_tokens: int = 0, used_tokens: Optional[Callable] = None):
+        """
+        Run fn() within the limits, retrying quota and server errors.
+
+        `estimated_tokens` is reserved from the tokens/min bucket before each
+        attempt; `used_tokens(result)` may return the real count so the
+        difference is charged or refunded.
+        """
+
+        throttle_errors, retryable_errors = api_errors()
+        attempt = 0
+
+        while True:
+            waited = self.requests.acquire(1)
+            waited += self.tokens.acquire(estimated_tokens)
+
+            started = time.monotonic()
+            epoch = self.concurrency.acquire()
+            waited += time.monotonic() - started
+
+            throttled = False
+            try:
+                result = fn()
+            except retryable_errors as e:
+                throttled = isinstance(e, throttle_errors)
+                error = e
+            else:
+                if used_tokens is not None:
+                    used = used_tokens(result)
+                    if used:
+                        self.tokens.adjust(used - estimated_tokens)
+
+                self._record(waited=waited)
+                return result
+            finally:
+                self.concurrency.release(epoch, throttled=throttled)
+
+            if attempt >= self.max_retries:
+                self._record(waited=waited, throttled=throttled, failed=True)
+                raise error
+
+            delay = self.backoff(attempt)
+            logger.warning(
+                f"Gemini call failed ({type(error).__name__}), retry {attempt + 1}/{self.max_retries} "
+                f"in {delay:.1f}s (concurrency limit {int(self.concurrency.limit)})"
+            )
+            self._record(waited=waited + delay, throttled=throttled, retried=True)
+
+            time.sleep(delay)
+            attempt += 1
+
+    def _record(self, waited: float, throttled: bool = False, retried: bool = False, failed: bool = False) -> None:
+        with self._stats_lock:
+            self._stats["wait_seconds"] += waited
+            if throttled:
+                self._stats["throttled"] += 1
+            if retried:
+                self._stats["retries"] += 1
+            elif failed:
+                self._stats["failed"] += 1
+            else:
+                self._stats["calls"] += 1
+
+    def get_stats(self) -> dict:
+        """Counters since process start plus the current concurrency limit"""
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        stats["wait_seconds"] = round(stats["wait_seconds"], 2)
+        stats["concurrency_limit"] = int(self.concurrency.limit)
+        return stats
@@ -0,0 +1,394 @@
+# rendering.py
+"""
+Page rendering and image encoding for the Gemini vision call.
+
+Rendering backends turn a page range of an in-memory PDF into PIL images:
+    - "pdfium": in-process PDFium binding (pypdfium2), no subprocess or temp file
+    - "poppler": pdf2image / pdftoppm subprocesses (original behaviour)
+    - "auto": pdfium inside a RenderPool process, poppler in the calling
+      thread (PDFium is serialized per process, pdftoppm runs in parallel);
+      whichever of the two is installed when only one is
+
+A profile decides how a rendered PDF page is turned into the bytes sent to
+Gemini: render DPI, grayscale, output format and quality, blank-margin
+cropping and a cap on the longest side. Encoded size and timings are
+recorded per profile so profiles can be compared on real traffic.
+
+This module does not depend on Django so that render_and_encode can run in
+a RenderPool worker process.
+"""
+
+import base64
+import io
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from PIL import Image, ImageOps
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # only the poppler backend is available
+    pdfium = None
+
+
+class PDFReadError(ValueError):
+    """The PDF could not be opened by the rendering backend."""
+    pass
+
+
+# "png" reproduces the original encoding (200 dpi RGB PNG, optimize=True), about 0.5s of
+# zlib per page; "png_fast" is still lossless, at a tenth of the encode time and a third of the size
+IMAGE_PROFILES = {
+    "png": {
+        "dpi": 200,
+        "format": "PNG",
+        "optimize": True,
+        "grayscale": False,
+        "quality": None,
+        "crop": False,
+        "max_side": None,
+    },
+    "png_fast": {
+        "dpi": 150,
+        "format": "PNG",
+        "optimize": False,
+        "grayscale": True,
+        "quality": None,
+        "crop": True,
+        "max_side": 2000,
+    },
+    "jpeg": {
+        "dpi": 150,
+        "format": "JPEG",
+        "grayscale": True,
+        "quality": 80,
+        "crop": True,
+        "max_side": 2000,
+    },
+    "webp": {
+        "dpi": 150,
+        "format": "WEBP",
+        "grayscale": True,
+        "quality": 75,
+        "crop": True,
+        "max_side": 1600,
+    },
+}
+
+MIME_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+}
+
+# Pixels lighter than this (0-255, after inversion: darker) count as blank margin
+CROP_THRESHOLD = 16
+CROP_PADDING = 12
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+# PDFium is not thread-safe: every call into the library goes through this lock
+_pdfium_lock = threading.Lock()
+
+
+# RENDERING BACKENDS
+
+def render_pages_poppler(pdf_bytes: bytes, first_page: int, last_page: int, dpi: int, grayscale: bool) -> list:
+    """Rasterize a page range in one pdf2image call (pdftoppm workers render pages in parallel)"""
+
+    from pdf2image import convert_from_bytes
+    from pdf2image.exceptions import PDFPageCountError
+
+    try:
+        # ppm skips poppler's PNG compression, the profile encodes the final image anyway
+        return convert_from_bytes(
+            pdf_bytes,
+            dpi=dpi,
+            fmt="ppm",
+            grayscale=grayscale,
+            first_page=first_page,
+            last_page=last_page,
+            thread_count=max(1, last_page - first_page + 1)
+        )
+    except PDFPageCountError:
+        raise PDFReadError("Could not read PDF - file may be corrupted")
+
+
+def render_pages_pdfium(pdf_bytes: bytes, first_page: int, last_page: int, dpi: int, grayscale: bool) -> list:
+    """Rasterize a page range in-process from the PDF bytes with PDFium"""
+
+    if pdfium is None:
+        raise RuntimeError("pypdfium2 is not installed")
+
+    images = []
+    with _pdfium_lock:
+        try:
+            pdf = pdfium.PdfDocument(pdf_bytes)
+        except pdfium.PdfiumError:
+            raise PDFReadError("Could not read PDF - file may be corrupted")
+
+        try:
+            for index in range(first_page - 1, min(last_page, len(pdf))):
+                page = pdf[index]
+                try:
+                    bitmap = page.render(scale=dpi / 72, grayscale=grayscale)
+                    images.append(bitmap.to_pil())
+                finally:
+                    page.close()
+        finally:
+            pdf.close()
+
+    return images
+
+
+RENDER_BACKENDS = {
+    "poppler": render_pages_poppler,
+    "pdfium": render_pages_pdfium,
+}
+
+
+def resolve_render_backend(name: str, pooled: bool = False) -> str:
+    """
+    Map a backend setting ("auto", "pdfium", "poppler") to an available backend.
+
+    pooled tells whether rendering runs in RenderPool processes: in the calling
+    thread every PDFium call of the process takes _pdfium_lock, so concurrent
+    extractions would rasterize one at a time.
+    """
+
+    if name == "auto":
+        if pdfium is None:
+            return "poppler"
+        return "pdfium" if pooled or shutil.which("pdftoppm") is None else "poppler"
+    if name not in RENDER_BACKENDS:
+        raise ValueError(
+            f"Unknown render backend '{name}' (expected auto, {', '.join(RENDER_BACKENDS)})"
+        )
+    if name == "pdfium" and pdfium is None:
+        raise ValueError("PDF_RENDER_BACKEND=pdfium but pypdfium2 is not installed")
+    return name
+
+
+def render_pdf_pages(pdf_bytes: bytes, first_page: int, last_page: int, profile: dict, backend: str = "auto") -> list:
+    """Rasterize pages first_page..last_page (1-based, inclusive) as PIL images"""
+
+    render = RENDER_BACKENDS[resolve_render_backend(backend)]
+    return render(pdf_bytes, first_page, last_page, profile["dpi"], profile["grayscale"])
+
+
+# ENCODING
+
+def get_image_profile(name: str) -> dict:
+    """Look up an encoding profile by name"""
+
+    if name not in IMAGE_PROFILES:
+        raise ValueError(
+            f"Unknown image profile '{name}' (expected one of: {', '.join(IMAGE_PROFILES)})"
+        )
+    return IMAGE_PROFILES[name]
+
+
+def crop_blank_margins(img: Image.Image, padding: int = CROP_PADDING) -> Image.Image:
+    """Crop the white border around the page content"""
+
+    gray = img if img.mode == "L" else img.convert("L")
+    mask = ImageOps.invert(gray).point(lambda p: 255 if p > CROP_THRESHOLD else 0)
+    bbox = mask.getbbox()
+
+    if not bbox:
+        return img  # blank page
+
+    left, top, right, bottom = bbox
+    return img.crop((
+        max(0, left - padding),
+        max(0, top - padding),
+        min(img.width, right + padding),
+        min(img.height, bottom + padding),
+    ))
+
+
+def encode_page_image(img: Image.Image, profile: dict) -> tuple[bytes, str]:
+    """Apply a profile to a rendered page and return (encoded bytes, mime type)"""
+
+    if profile["grayscale"] and img.mode != "L":
+        img = img.convert("L")
+    elif not profile["grayscale"] and img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    if profile["crop"]:
+        img = crop_blank_margins(img)
+
+    max_side = profile["max_side"]
+    if max_side and max(img.size) > max_side:
+        img = img.copy()
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    fmt = profile["format"]
+    buf = io.BytesIO()
+
+    if fmt == "PNG":
+        img.save(buf, format="PNG", optimize=profile.get("optimize", False))
+    elif fmt == "JPEG":
+        img.save(buf, format="JPEG", quality=profile["quality"], optimize=False)
+    elif fmt == "WEBP":
+        img.save(buf, format="WEBP", quality=profile["quality"], method=2)
+    else:
+        raise ValueError(f"Unsupported image format '{fmt}'")
+
+    data = buf.getvalue()
+    buf.close()
+
+    return data, MIME_TYPES[fmt]
+
+
+def record_encoding(profile_name: str, encoded_bytes: int, render_seconds: float, encode_seconds: float) -> None:
+    """Accumulate size and timings of one encoded page"""
+
+    with _stats_lock:
+        stats = _stats.setdefault(profile_name, {
+            "pages": 0,
+            "bytes": 0,
+            "render_seconds": 0.0,
+            "encode_seconds": 0.0,
+        })
+        stats["pages"] += 1
+        stats["bytes"] += encoded_bytes
+        stats["render_seconds"] += render_seconds
+        stats["encode_seconds"] += encode_seconds
+
+
+def get_encoding_stats() -> dict:
+    """Per-profile totals and averages since process start"""
+
+    with _stats_lock:
+        snapshot = {name: dict(stats) for name, stats in _stats.items()}
+
+    for stats in snapshot.values():
+        pages = stats["pages"] or 1
+        stats["avg_bytes"] = round(stats["bytes"] / pages)
+        stats["avg_render_ms"] = round(stats["render_seconds"] / pages * 1000, 1)
+        stats["avg_encode_ms"] = round(stats["encode_seconds"] / pages * 1000, 1)
+
+    return snapshot
+
+
+# RENDER + ENCODE (runs inline or in a RenderPool process)
+
+def render_and_encode(pdf_bytes: bytes, first_page: int, last_page: int, profile_name: str, backend: str) -> tuple[list, list]:
+    """
+    Render a page range and encode every page with a profile.
+
+    Returns ([(base64 data, mime type), ...], [(encoded bytes, render s, encode s), ...]).
+    Timings are returned instead of recorded so the caller's process keeps the stats.
+    """
+
+    profile = get_image_profile(profile_name)
+
+    started = time.perf_counter()
+    images = render_pdf_pages(pdf_bytes, first_page, last_page, profile, backend=backend)
+
+    if not images:
+        raise ValueError("No pages found in PDF")
+
+    render_seconds = (time.perf_counter() - started) / len(images)
+
+    # Pages are encoded one after the other: PIL's encoders hold the GIL, threads
+    # gain nothing; CVs run in parallel across RenderPool processes instead
+    pages, timings = [], []
+    for img in images:
+        encode_started = time.perf_counter()
+        data, mime_type = encode_page_image(img, profile)
+        pages.append((base64.b64encode(data).decode("utf-8"), mime_type))
+        timings.append((len(data), render_seconds, time.perf_counter() - encode_started))
+
+    del images
+
+    return pages, timings
+
+
+class RenderPoolError(ValueError):
+    """The render pool rejected, timed out or lost a task."""
+    pass
+
+
+class RenderPool:
+    """
+    Process pool for the CPU-bound render/encode stage.
+
+    At most `processes` tasks run at once, at most `queue_depth` more may wait
+    for a slot (further callers get RenderPoolError), and a task running longer
+    than `timeout` seconds has its process killed so a malformed PDF cannot
+    hold a web worker forever. Workers are spawned (not forked) so they never
+    inherit the web process' threads, DB connections or loaded models.
+    """
+
+    def __init__(self, processes: int, queue_depth: int, timeout: float):
+        self.processes = processes
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(processes)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=get_context("spawn")
+                )
+            return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Kill the processes of a stuck or broken executor, the next task starts a new one"""
+
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn, *args):
+        with self._lock:
+            if self._waiting >= self.queue_depth:
+                raise RenderPoolError("Too many CVs waiting for rendering, try again later")
+            self._waiting += 1
+
+        try:
+            self._slots.acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        try:
+            # One retry when the pool broke because of another task's timeout or crash
+            for attempt in range(2):
+                executor = self._get_executor()
+                future = executor.submit(fn, *args)
+
+                try:
+                    return future.result(timeout=self.timeout)
+                except TimeoutError:
+                    self._restart(executor)
+                    raise RenderPoolError(f"PDF rendering timed out after {self.timeout:g}s")
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    if attempt:
+                        raise RenderPoolError("PDF rendering process crashed")
+        finally:
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
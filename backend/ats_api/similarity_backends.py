@@ -0,0 +1,121 @@
+# similarity_backends.py
+"""
+Inference backends for the similarity model (SentenceTransformer).
+
+    - "torch": the published model in full precision on PyTorch (default)
+    - "onnx_int8": the same model exported once to ONNX, weights dynamically
+      quantized to int8 for the CPU's instruction set, run by ONNX Runtime
+
+The export is written to `<export_dir>/<model name>/` on first load and
+reused by every later process; the directory is a regular SentenceTransformer
+folder (tokenizer, pooling, onnx/model.onnx + the quantized file), so it can
+also be built ahead of time and shipped with the deployment.
+
+The onnx_int8 backend needs the optional `sentence-transformers[onnx]` extra
+(optimum + onnxruntime).
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_BACKENDS = ("torch", "onnx_int8")
+
+# export_dynamic_quantized_onnx_model targets (VNNI and ARM kernels need a matching CPU)
+QUANTIZATION_TARGETS = ("avx2", "avx512", "avx512_vnni", "arm64")
+
+
+def embedding_model_id(model_name: str, backend: str, quantization: str) -> str:
+    """Identity of the vectors a backend produces (embedding cache and vector index key)"""
+
+    if backend == "torch":
+        return model_name
+    return f"{model_name}@{backend}-{quantization}"
+
+
+def export_dir_for(model_name: str, export_dir: Path) -> Path:
+    return Path(export_dir) / model_name.replace("/", "__")
+
+
+def quantized_file(directory: Path, quantization: str) -> Optional[str]:
+    """Path (relative to directory) of the int8 model for a target, None if not exported yet"""
+
+    # avx2 produces model_quint8_avx2.onnx, the other targets model_qint8_<target>.onnx
+    for path in sorted((Path(directory) / "onnx").glob(f"model_*int8_{quantization}.onnx")):
+        return path.relative_to(directory).as_posix()
+    return None
+
+
+def export_onnx_int8(model_name: str, export_dir: Path, quantization: str = "avx2", token: Optional[str] = None) -> Path:
+    """Export and quantize the model unless already done, return the model directory"""
+
+    if quantization not in QUANTIZATION_TARGETS:
+        raise ValueError(
+            f"Unknown quantization target '{quantization}' (expected one of: {', '.join(QUANTIZATION_TARGETS)})"
+        )
+
+    directory = export_dir_for(model_name, export_dir)
+    if quantized_file(directory, quantization):
+        return directory
+
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    logger.info("Exporting %s to ONNX (int8, %s) in %s", model_name, quantization, directory)
+
+    # Build next to the final directory and swap it in, so concurrent processes
+    # never load a half-written export
+    tmp_dir = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    try:
+        # backend="onnx" converts the PyTorch weights when the hub has no ONNX file
+        model = SentenceTransformer(model_name, backend="onnx", token=token)
+        model.save(str(tmp_dir))
+        export_dynamic_quantized_onnx_model(model, quantization, str(tmp_dir))
+
+        if directory.exists():
+            # Another target already exported: only add the new quantized file
+            (directory / "onnx").mkdir(exist_ok=True)
+            name = quantized_file(tmp_dir, quantization)
+            os.replace(tmp_dir / name, directory / name)
+        else:
+            directory.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.replace(tmp_dir, directory)
+            except OSError:
+                if not quantized_file(directory, quantization):  # lost the race to another process
+                    raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return directory
+
+
+def load_similarity_model(
+    model_name: str,
+    backend: str = "torch",
+    quantization: str = "avx2",
+    export_dir: Optional[Path] = None,
+    token: Optional[str] = None,
+):
+    """Load the SentenceTransformer on the selected backend (encode() works the same on both)"""
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name, token=token)
+
+    if backend == "onnx_int8":
+        directory = export_onnx_int8(model_name, export_dir, quantization, token)
+        return SentenceTransformer(
+            str(directory),
+            backend="onnx",
+            model_kwargs={"file_name": quantized_file(directory, quantization)},
+        )
+
+    raise ValueError(f"Unknown similarity backend '{backend}' (expected one of: {', '.join(SIMILARITY_BACKENDS)})")
+
@@ -0,0 +1,193 @@
+# synthetic.py
+"""
+Synthetic CVs, job descriptions and LLM outputs for benchmarks and load tests.
+
+Everything is derived from an integer index, so two runs (or two commits)
+exercise exactly the same inputs:
+    - text-layer PDFs (digital CVs, the pypdf fast path)
+    - image-only PDFs (scanned CVs, the rasterization + vision path)
+    - messy model outputs in the shapes extract_json has to repair
+"""
+
+import io
+import json
+import random
+import time
+
+from PIL import Image, ImageDraw
+
+FIRST_NAMES = ["Jean", "Marie", "Hery", "Fara", "Luc", "Nirina", "Sophie", "Tojo", "Paul", "Voahangy"]
+LAST_NAMES = ["Rakoto", "Rabe", "Dupont", "Randria", "Martin", "Andriamanana", "Bernard", "Razafy"]
+CITIES = ["Antananarivo", "Toamasina", "Paris", "Lyon", "Fianarantsoa", "Montreal"]
+SKILLS = [
+    "Python", "Django", "JavaScript", "TypeScript", "React", "SQL", "PostgreSQL",
+    "Docker", "Kubernetes", "Git", "Linux", "AWS", "Java", "Spring", "Node.js",
+    "Gestion de projet", "Scrum", "Machine Learning", "Pandas", "REST API",
+]
+TITLES = [
+    "Developpeur Full Stack", "Data Scientist", "Ingenieur DevOps",
+    "Developpeur Backend", "Chef de projet IT", "Developpeur Frontend",
+]
+COMPANIES = ["Orange", "Telma", "Capgemini", "Sopra Steria", "Vivetic", "Axian"]
+
+PAGE_SIZE = (595, 842)  # A4 in PDF points
+FIXED_PDF_DATE = time.gmtime(0)
+
+
+def synthetic_cv(index: int) -> dict:
+    """Structured CV data, as the extraction step would return it"""
+
+    rng = random.Random(f"cv-{index}")
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+    return {
+        "identite": {
+            "nom": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}.{index}@example.com",
+            "telephone": f"+261 34 {rng.randint(10, 99)} {rng.randint(100, 999)} {rng.randint(10, 99)}",
+            "adresse": rng.choice(CITIES),
+        },
+        "job_title": rng.choice(TITLES),
+        "competences": rng.sample(SKILLS, rng.randint(4, 9)),
+        "resume_experience": (
+            f"{rng.randint(1, 15)} ans d'experience chez {rng.choice(COMPANIES)} "
+            f"et {rng.choice(COMPANIES)}, projets web et data."
+        ),
+    }
+
+
+def synthetic_job_description(index: int) -> str:
+    rng = random.Random(f"job-{index}")
+    skills = rng.sample(SKILLS, rng.randint(4, 7))
+
+    return (
+        f"{rng.choice(COMPANIES)} recrute un(e) {rng.choice(TITLES)} a {rng.choice(CITIES)}. "
+        f"Missions: concevoir et maintenir nos applications, participer aux revues de code, "
+        f"accompagner l'equipe produit. Profil: {rng.randint(2, 8)} ans d'experience minimum. "
+        f"Competences requises: {', '.join(skills)}. Contrat CDI, teletravail partiel."
+    )
+
+
+def cv_lines(index: int, pages: int) -> list[list[str]]:
+    """Text of a synthetic CV split over `pages` pages"""
+
+    cv = synthetic_cv(index)
+    rng = random.Random(f"cv-lines-{index}")
+    identite = cv["identite"]
+
+    header = [
+        identite["nom"],
+        cv["job_title"],
+        f"{identite['email']} - {identite['telephone']} - {identite['adresse']}",
+        "",
+        "COMPETENCES",
+        ", ".join(cv["competences"]),
+        "",
+        "EXPERIENCE",
+        cv["resume_experience"],
+    ]
+
+    result = []
+    for page in range(pages):
+        lines = header if page == 0 else [f"{identite['nom']} - page {page + 1}"]
+        for _ in range(8):
+            lines = lines + [
+                "",
+                f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({2010 + rng.randint(0, 14)})",
+                f"Realisation de projets {rng.choice(SKILLS)} et {rng.choice(SKILLS)} pour des clients grands comptes.",
+                f"Mise en place de pipelines {rng.choice(SKILLS)}, encadrement de {rng.randint(2, 9)} developpeurs.",
+            ]
+        result.append(lines)
+    return result
+
+
+def text_layer_pdf(pages: list[list[str]]) -> bytes:
+    """Minimal digital PDF (Helvetica, ASCII text) with one page per line list"""
+
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    page_count = len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + i * 2} 0 R" for i in range(page_count)), page_count
+        ),
+    ]
+    font_ref = 3 + page_count * 2
+
+    for i, lines in enumerate(pages):
+        stream = "BT /F1 10 Tf 40 800 Td " + " ".join(
+            f"({escape(line)}) Tj 0 -13 Td" for line in lines
+        ) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_SIZE[0]} {PAGE_SIZE[1]}] "
+            f"/Contents {4 + i * 2} 0 R /Resources << /Font << /F1 {font_ref} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+
+    return out.encode("latin-1")
+
+
+def scanned_pdf(pages: list[list[str]], dpi: int = 100) -> bytes:
+    """Image-only PDF: each page is a grayscale scan of the text, no text layer"""
+
+    scale = dpi / 72
+    size = (int(PAGE_SIZE[0] * scale), int(PAGE_SIZE[1] * scale))
+    images = []
+
+    for lines in pages:
+        img = Image.new("L", size, 255)
+        draw = ImageDraw.Draw(img)
+        y = int(40 * scale)
+        for line in lines:
+            draw.text((int(40 * scale), y), line, fill=0)
+            y += int(13 * scale)
+        images.append(img)
+
+    buf = io.BytesIO()
+    images[0].save(
+        buf,
+        format="PDF",
+        save_all=True,
+        append_images=images[1:],
+        resolution=dpi,
+        # PIL stamps the current time otherwise, and the bytes (and PDF hash) would change every second
+        creationDate=FIXED_PDF_DATE,
+        modDate=FIXED_PDF_DATE,
+    )
+    return buf.getvalue()
+
+
+def synthetic_cv_pdf(index: int, pages: int = 1, scanned: bool = False) -> bytes:
+    lines = cv_lines(index, pages)
+    return scanned_pdf(lines) if scanned else text_layer_pdf(lines)
+
+
+def messy_llm_outputs(data: dict) -> list[str]:
+    """The same JSON in the shapes models actually answer with"""
+
+    clean = json.dumps(data, ensure_ascii=False)
+    pretty = json.dumps(data, ensure_ascii=False, indent=2)
+
+    return [
+        clean,
+        f"```json\n{pretty}\n```",
+        f"Voici les informations extraites du CV :\n\n{pretty}\n\nN'hesitez pas si besoin.",
+        pretty.replace("]", ",]").replace("\n}", ",\n}"),  # trailing commas
+        pretty.replace('"nom"', "“nom”"),  # fancy quotes
+        "---\n" + pretty.replace(",", ",\u200b") + "\n---",  # separators, zero-width spaces
+    ]
@@ -1,3 +1,370 @@
-from django.test import TestCase
+import hashlib
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from google.api_core import exceptions as api_exceptions
+
+from . import batches, views
+from .extraction_backends import InlineStubBackend, RecordBackend, ReplayBackend
+from .models import CV, Evaluation, EvaluationBatch, EvaluationBatchItem, JobExtraction, TextEmbedding
+from .ratelimit import AdaptiveConcurrency, RateLimiter, TokenBucket
+from .synthetic import synthetic_cv, synthetic_cv_pdf, synthetic_job_description
+from .vector_index import VectorIndex
+
+
+class VectorIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def open_index(self) -> VectorIndex:
+        return VectorIndex(self.tmp.name, "cvs", "test-model")
+
+    def test_upsert_and_search(self):
+        index = self.open_index()
+        index.upsert([1, 2, 3], np.eye(3, dtype=np.float32), last_id=3)
+
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.last_id, 3)
+        self.assertEqual(index.search(np.array([0, 1, 0]), k=1)[0][0], 2)
+        self.assertEqual(sorted(id_ for id_, _ in index.search(np.array([0, 1, 0]), k=3, exclude=[2])), [1, 3])
+
+    def test_other_handle_sees_appended_rows(self):
+        worker, other = self.open_index(), self.open_index()
+        worker.upsert([1, 2], np.eye(2, 4, dtype=np.float32), last_id=2)
+
+        other.refresh()
+        other.upsert([3], np.eye(1, 4, k=2, dtype=np.float32), last_id=3)
+
+        worker.refresh()
+        self.assertEqual(worker._ids.tolist(), [1, 2, 3])
+        self.assertEqual(worker.last_id, 3)
+
+    def test_reset_by_other_handle_drops_stale_rows(self):
+        worker, rebuild = self.open_index(), self.open_index()
+        worker.upsert([1, 2, 3], np.eye(3, 4, dtype=np.float32), last_id=3)
+
+        # build_vector_index --rebuild in another process while the worker keeps its handle
+        rebuild.reset()
+
+        worker.refresh()
+        self.assertEqual(len(worker), 0)
+        self.assertEqual(worker.last_id, 0)
+        self.assertNotIn(1, worker)
+
+        worker.upsert([4, 5], np.eye(2, 4, dtype=np.float32), last_id=5)
+        rebuild.upsert([1, 2, 3], np.eye(3, 4, dtype=np.float32), last_id=3)
+
+        fresh = self.open_index()
+        fresh.refresh()
+        self.assertEqual(sorted(fresh._ids.tolist()), [1, 2, 3, 4, 5])
+        self.assertEqual(fresh.last_id, 5)
+
+
+class SyntheticPdfTests(SimpleTestCase):
+    def test_scanned_pdf_is_byte_identical_across_runs(self):
+        first = synthetic_cv_pdf(3, pages=2, scanned=True)
+        # An hour later, as seen by PIL's default CreationDate / ModDate
+        with mock.patch("time.gmtime", return_value=time.gmtime(time.time() + 3600)):
+            second = synthetic_cv_pdf(3, pages=2, scanned=True)
+
+        self.assertEqual(first, second)
+
+    def test_text_layer_pdf_is_byte_identical_across_runs(self):
+        self.assertEqual(synthetic_cv_pdf(3, pages=2), synthetic_cv_pdf(3, pages=2))
+
+
+class AdaptiveConcurrencyTests(SimpleTestCase):
+    def test_burst_of_throttles_halves_once(self):
+        concurrency = AdaptiveConcurrency(8)
+        epochs = [concurrency.acquire() for _ in range(8)]
+
+        for epoch in epochs:
+            concurrency.release(epoch, throttled=True)
+
+        self.assertEqual(concurrency.limit, 4)
+
+    def test_throttle_after_decrease_halves_again(self):
+        concurrency = AdaptiveConcurrency(8)
+        concurrency.release(concurrency.acquire(), throttled=True)
+        concurrency.release(concurrency.acquire(), throttled=True)
+
+        self.assertEqual(concurrency.limit, 2)
+
+    def test_successes_grow_limit_back(self):
+        concurrency = AdaptiveConcurrency(4)
+        concurrency.release(concurrency.acquire(), throttled=True)
+
+        # +1/limit per success: one extra slot after about `limit` successes
+        for _ in range(3):
+            concurrency.release(concurrency.acquire())
+
+        self.assertEqual(int(concurrency.limit), 3)
+
+
+class FakeClock:
+    """time.monotonic / time.sleep for the rate limiter, sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("ats_api.ratelimit.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bucket_waits_for_refill_once_empty(self):
+        bucket = TokenBucket(60)  # one unit per second
+
+        self.assertEqual(bucket.acquire(60), 0.0)
+        self.assertAlmostEqual(bucket.acquire(3), 3.0)
+
+        # Never holds more than one minute of budget
+        self.clock.now += 3600
+        self.assertEqual(bucket.acquire(60), 0.0)
+        self.assertAlmostEqual(bucket.acquire(1), 1.0)
+
+    def test_retries_throttled_calls_with_backoff(self):
+        limiter = RateLimiter(0, 0, 4, max_retries=3, base_delay=1.0, max_delay=60.0)
+        fn = mock.Mock(side_effect=[api_exceptions.TooManyRequests("429"), api_exceptions.ServiceUnavailable("503"), "ok"])
+
+        with mock.patch("ats_api.ratelimit.random.uniform", side_effect=lambda low, high: high), \
+                self.assertLogs("ats_api.ratelimit", "WARNING"):
+            self.assertEqual(limiter.call(fn), "ok")
+
+        self.assertEqual(self.clock.slept, [1.0, 2.0])
+        self.assertEqual(limiter.get_stats()["retries"], 2)
+        self.assertEqual(limiter.get_stats()["throttled"], 1)
+
+    def test_gives_up_after_max_retries(self):
+        limiter = RateLimiter(0, 0, 4, max_retries=2, base_delay=1.0)
+        fn = mock.Mock(side_effect=api_exceptions.ResourceExhausted("quota"))
+
+        with self.assertRaises(api_exceptions.ResourceExhausted), self.assertLogs("ats_api.ratelimit", "WARNING"):
+            limiter.call(fn)
+
+        self.assertEqual(fn.call_count, 3)
+        self.assertEqual(limiter.get_stats()["failed"], 1)
+
+    def test_client_errors_are_not_retried(self):
+        limiter = RateLimiter(0, 0, 4, max_retries=5)
+        fn = mock.Mock(side_effect=api_exceptions.InvalidArgument("bad prompt"))
+
+        with self.assertRaises(api_exceptions.InvalidArgument):
+            limiter.call(fn)
+
+        self.assertEqual(fn.call_count, 1)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_backoff_is_capped(self):
+        limiter = RateLimiter(0, 0, 4, base_delay=1.0, max_delay=10.0)
+
+        with mock.patch("ats_api.ratelimit.random.uniform", side_effect=lambda low, high: high):
+            self.assertEqual([limiter.backoff(attempt) for attempt in range(6)], [1.0, 2.0, 4.0, 8.0, 10.0, 10.0])
+
+
+class RecordReplayTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_replay_serves_recorded_responses(self):
+        content = [{"text": "Extrais les informations du CV"}, {"text": synthetic_job_description(1)}]
+        recorded = RecordBackend(InlineStubBackend(), self.tmp.name).generate(content)
+
+        self.assertEqual(ReplayBackend(self.tmp.name).generate(content), recorded)
+
+    def test_replay_rejects_unknown_prompts(self):
+        with self.assertRaises(ValueError):
+            ReplayBackend(self.tmp.name).generate([{"text": "never recorded"}])
+
+
+class FakeSimilarityModel:
+    """Hashed bag-of-words vectors, records every text it encodes"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.encoded.extend(texts)
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1
+        return vectors
+
+
+def fake_extract_cv(pdf_bytes: bytes) -> dict:
+    return synthetic_cv(int(pdf_bytes.rsplit(b" ", 1)[-1]))
+
+
+def fake_extract_job(job_description: str) -> dict:
+    return {
+        "job_title": "Developpeur Backend",
+        "job_competences": ["Python", "Django"],
+        "company_name": "",
+        "location": "",
+        "type_de_contrat": "",
+    }
+
+
+def upload(index: int) -> SimpleUploadedFile:
+    return SimpleUploadedFile(f"cv{index}.pdf", b"%PDF-1.4 fake " + str(index).encode(), content_type="application/pdf")
+
+
+class PipelineTestCase(TestCase):
+    """Upload pipeline with fake Gemini calls and a fake similarity model, files under a temporary directory"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.model = self.patch("_similarity_model", FakeSimilarityModel())
+        self.extract_cv = self.patch("gemini_extract_cv", mock.Mock(side_effect=fake_extract_cv))
+        self.extract_job = self.patch("gemini_extract_job", mock.Mock(side_effect=fake_extract_job))
+        self.patch("_cv_index", VectorIndex(tmp.name, "cvs", views.EMBEDDING_MODEL_ID))
+        self.patch("_job_offer_index", VectorIndex(tmp.name, "job_offers", views.EMBEDDING_MODEL_ID))
+
+    def patch(self, name: str, value):
+        patcher = mock.patch.object(views, name, value)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def evaluate(self, job_description: str, *indexes: int) -> dict:
+        response = self.client.post("/api/upload_and_evaluate/", {
+            "job_description": job_description,
+            "resumes": [upload(index) for index in indexes],
+        })
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+
+class PdfDedupeTests(PipelineTestCase):
+    def test_same_pdf_reuses_saved_extraction(self):
+        self.evaluate(synthetic_job_description(1), 1, 2)
+        self.evaluate(synthetic_job_description(2), 1, 2, 3)
+
+        self.assertEqual(self.extract_cv.call_count, 3)
+        self.assertEqual(CV.objects.count(), 3)
+        self.assertEqual(Evaluation.objects.count(), 5)
+
+
+class EmbeddingCacheTests(PipelineTestCase):
+    def test_texts_are_encoded_once(self):
+        texts = ["python django", "java spring", "python django"]
+        first = views.encode_texts(texts)
+        second = views.encode_texts(texts[:2])
+
+        self.assertEqual(self.model.encoded, ["python django", "java spring"])
+        self.assertEqual(TextEmbedding.objects.count(), 2)
+        np.testing.assert_array_equal(first[:2], second)
+        np.testing.assert_array_equal(first[0], first[2])
+
+
+class JobExtractionCacheTests(PipelineTestCase):
+    def test_normalized_description_hits_cache(self):
+        views.cached_extract_job("Python  developer\n")
+        views.cached_extract_job("Python developer")
+
+        self.assertEqual(self.extract_job.call_count, 1)
+
+    def test_refresh_and_expiry_call_gemini_again(self):
+        views.cached_extract_job("Python developer")
+        views.cached_extract_job("Python developer", refresh=True)
+        self.assertEqual(self.extract_job.call_count, 2)
+
+        JobExtraction.objects.update(extracted_at=timezone.now() - timedelta(seconds=views.JOB_EXTRACTION_CACHE_TTL + 1))
+        views.cached_extract_job("Python developer")
+        self.assertEqual(self.extract_job.call_count, 3)
+
+    def test_waiting_miss_reuses_extraction_made_meanwhile(self):
+        @contextmanager
+        def lock_held_by_other_request(key):
+            # That request stores its extraction before releasing the lock
+            JobExtraction.objects.create(key=key, job_data='{"job_title": "Stored"}', extracted_at=timezone.now())
+            yield
+
+        with mock.patch.object(views, "_job_extraction_lock", lock_held_by_other_request):
+            self.assertEqual(views.cached_extract_job("Python developer"), {"job_title": "Stored"})
+
+        self.assertEqual(self.extract_job.call_count, 0)
+
+
+class RescoreTests(PipelineTestCase):
+    def test_rescore_of_fresh_scores_changes_nothing(self):
+        # Both descriptions extract to the same job data
+        self.evaluate("Python backend developer, Django", 1, 2)
+        self.evaluate("Comptable junior, Excel et SAP", 1, 2)
+        before = dict(Evaluation.objects.values_list("id", "score"))
+
+        progress = list(views.rescore_evaluations(force=True))[-1]
+
+        self.assertEqual(progress["done"], 4)
+        self.assertEqual(progress["changed"], 0)
+        self.assertEqual(dict(Evaluation.objects.values_list("id", "score")), before)
+
+
+class BatchQueueTests(PipelineTestCase):
+    def submit(self, *indexes: int) -> EvaluationBatch:
+        response = self.client.post("/api/batches/", {
+            "job_description": synthetic_job_description(1),
+            "resumes": [upload(index) for index in indexes],
+        })
+        self.assertEqual(response.status_code, 202, response.content)
+        return EvaluationBatch.objects.latest("id")
+
+    def test_batch_is_claimed_once(self):
+        batch = self.submit(1)
+
+        self.assertEqual(batches.claim_next_batch().id, batch.id)
+        self.assertIsNone(batches.claim_next_batch())
+
+    def test_stale_running_batch_is_requeued(self):
+        batch = self.submit(1)
+        batches.claim_next_batch()
+
+        self.assertEqual(batches.requeue_stale_batches(timedelta(minutes=5)), 0)
+
+        EvaluationBatch.objects.filter(id=batch.id).update(heartbeat_at=timezone.now() - timedelta(minutes=10))
+        self.assertEqual(batches.requeue_stale_batches(timedelta(minutes=5)), 1)
+        self.assertEqual(batches.claim_next_batch().id, batch.id)
+
+    def test_resumed_batch_finishes_extracted_items(self):
+        batch = self.submit(1, 2)
+        batches.process_batch(batches.claim_next_batch())
+
+        # As if the worker died after saving the CVs but before scoring them
+        batch.items.update(status=EvaluationBatchItem.EXTRACTED, evaluation=None, result=None)
+        Evaluation.objects.all().delete()
+        EvaluationBatch.objects.filter(id=batch.id).update(status=EvaluationBatch.RUNNING)
+        batch.refresh_from_db()
+
+        batches.process_batch(batch)
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, EvaluationBatch.DONE)
+        self.assertEqual(set(batch.items.values_list("status", flat=True)), {EvaluationBatchItem.DONE})
+        self.assertEqual(Evaluation.objects.count(), 2)
+        self.assertEqual(self.extract_cv.call_count, 2)
@@ -3,7 +3,15 @@ from . import views
 
 urlpatterns = [
     path('upload_and_evaluate/', views.evaluate_cv_vs_offer, name='evaluate_cv_vs_offer'),
+    path('upload_and_evaluate/stream/', views.evaluate_cv_vs_offer_stream, name='evaluate_cv_vs_offer_stream'),
+    path('batches/', views.submit_evaluation_batch, name='submit_evaluation_batch'),
+    path('batches/<int:batch_id>/', views.evaluation_batch_status, name='evaluation_batch_status'),
+    path('batches/<int:batch_id>/results/', views.evaluation_batch_results, name='evaluation_batch_results'),
+    path('rank_candidats/', views.rank_candidats, name='rank_candidats'),
+    path('rank_job_offers/', views.rank_job_offers, name='rank_job_offers'),
     path('health/', views.health_check, name='health_check'),
+    path('rescore/', views.rescore, name='rescore'),
+    path('metrics/', views.metrics, name='metrics'),
     path("candidats/", views.list_candidats),
     path("job_offers/", views.list_job_offers),
 ]
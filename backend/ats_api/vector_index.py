@@ -0,0 +1,271 @@
+# vector_index.py
+"""
+Memory-mapped vector index for nearest-neighbour search over embeddings.
+
+Each index lives in three files under a directory:
+    <name>.f32   row-major float32 matrix, one L2-normalized vector per row
+    <name>.ids   int64 database id of each row
+    <name>.json  model name, dimension, row count, the highest source id
+                 indexed and a generation bumped by every write
+
+Vectors are memory-mapped, so loading an index with tens of thousands of
+rows is instant and the pages are shared between worker processes. New rows
+are appended in place; a file lock keeps concurrent writers from different
+processes consistent, and every handle reloads when the generation changes.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """Exact cosine-similarity index over float32 vectors keyed by integer ids"""
+
+    def __init__(self, directory: Path, name: str, model_name: str):
+        self.directory = Path(directory)
+        self.name = name
+        self.model_name = model_name
+
+        self.vectors_path = self.directory / f"{name}.f32"
+        self.ids_path = self.directory / f"{name}.ids"
+        self.meta_path = self.directory / f"{name}.json"
+        self.lock_path = self.directory / f"{name}.lock"
+
+        self.dimension: Optional[int] = None
+        self.last_id = 0
+
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows: dict[int, int] = {}
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._generation: Optional[int] = None  # meta "generation" of the loaded state
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, id_: int) -> bool:
+        return int(id_) in self._rows
+
+    # Locking
+
+    def locked(self):
+        """Context manager holding both the thread lock and the file lock"""
+
+        return _IndexLock(self)
+
+    # Persistence
+
+    def refresh(self) -> None:
+        """(Re)load the index from disk if any handle, in any process, wrote it since the last load"""
+
+        with self._lock:
+            meta = self._read_meta()
+            if not self._is_usable(meta):
+                with self.locked():
+                    meta = self._read_meta()
+                    if not self._is_usable(meta):
+                        if meta is not None:
+                            logger.info(f"Vector index '{self.name}' built with another model, resetting")
+                        self._reset_files()
+                        return
+
+            if meta.get("generation", 0) == self._generation:
+                return
+
+            # Start from scratch: a reset by another process leaves nothing of the old rows valid
+            self._clear()
+            self.last_id = meta.get("last_id", 0)
+            self._generation = meta.get("generation", 0)
+
+            dimension = meta.get("dimension")
+            if not dimension:
+                return
+
+            size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+            ids = np.fromfile(self.ids_path, dtype=np.int64) if self.ids_path.exists() else np.zeros(0, dtype=np.int64)
+            # Rows past "count" are the tail of a write that crashed before its meta update
+            count = min(meta.get("count", len(ids)), len(ids), size // (dimension * 4))
+
+            self.dimension = dimension
+            self._ids = ids[:count]
+            self._vectors = (
+                np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, dimension))
+                if count else np.zeros((0, dimension), dtype=np.float32)
+            )
+            self._rows = {int(id_): row for row, id_ in enumerate(self._ids)}
+
+    def reset(self) -> None:
+        """Drop every vector (used before a full rebuild)"""
+
+        with self.locked():
+            self._reset_files()
+
+    def _is_usable(self, meta: Optional[dict]) -> bool:
+        return meta is not None and meta.get("model_name") == self.model_name
+
+    def _clear(self) -> None:
+        self.dimension = None
+        self.last_id = 0
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows = {}
+
+    def _reset_files(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in (self.vectors_path, self.ids_path):
+            path.write_bytes(b"")
+
+        self._clear()
+        self._write_meta(count=0)
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            return json.loads(self.meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, count: int) -> None:
+        """Write the meta file with a new generation, which makes every other handle reload (file lock held)"""
+
+        previous = (self._read_meta() or {}).get("generation", 0)
+        self._generation = max(previous, self._generation or 0) + 1
+
+        tmp_path = self.meta_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps({
+            "model_name": self.model_name,
+            "dimension": self.dimension,
+            "last_id": self.last_id,
+            "count": count,
+            "generation": self._generation,
+        }))
+        os.replace(tmp_path, self.meta_path)
+
+    # Updates
+
+    def upsert(self, ids: Iterable[int], vectors: np.ndarray, last_id: Optional[int] = None) -> None:
+        """
+        Add or replace vectors. Existing ids are overwritten in place, new ids
+        are appended. Call inside `locked()` when combined with a DB query.
+        """
+
+        ids = [int(id_) for id_ in ids]
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)) if ids else vectors
+
+        with self.locked():
+            self.refresh()
+
+            new_ids, new_rows = [], []
+            try:
+                if ids:
+                    if self.dimension is None:
+                        self.dimension = vectors.shape[1]
+                    elif vectors.shape[1] != self.dimension:
+                        raise ValueError(
+                            f"Vector dimension {vectors.shape[1]} does not match index dimension {self.dimension}"
+                        )
+
+                    existing = []
+
+                    for id_, vector in zip(ids, vectors):
+                        if id_ in self._rows:
+                            existing.append((self._rows[id_], vector))
+                        else:
+                            self._rows[id_] = len(self._ids) + len(new_ids)
+                            new_ids.append(id_)
+                            new_rows.append(vector)
+
+                    if existing:
+                        writable = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=self._vectors.shape)
+                        for row, vector in existing:
+                            writable[row] = vector
+                        writable.flush()
+                        del writable
+
+                    if new_ids:
+                        # Drop any half-written tail left by a crash so ids and rows stay aligned
+                        os.truncate(self.ids_path, len(self._ids) * 8)
+                        os.truncate(self.vectors_path, len(self._ids) * self.dimension * 4)
+
+                        with open(self.ids_path, "ab") as f:
+                            f.write(np.asarray(new_ids, dtype=np.int64).tobytes())
+                        with open(self.vectors_path, "ab") as f:
+                            f.write(np.ascontiguousarray(new_rows, dtype=np.float32).tobytes())
+
+                if last_id is not None:
+                    self.last_id = max(self.last_id, last_id)
+
+                self._write_meta(count=len(self._ids) + len(new_ids))
+            finally:
+                # Always reload from disk so a failed write never leaves stale row mappings
+                self._generation = None
+                self.refresh()
+
+    # Queries
+
+    def search(self, query: np.ndarray, k: int = 10, exclude: Iterable[int] = ()) -> list[tuple[int, float]]:
+        """Return up to k (id, cosine similarity) pairs, best first"""
+
+        with self._lock:
+            vectors, ids = self._vectors, self._ids
+
+        if not len(ids) or k <= 0:
+            return []
+
+        query = _normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        scores = vectors @ query
+
+        excluded = [self._rows[id_] for id_ in exclude if id_ in self._rows]
+        if excluded:
+            scores = scores.copy()
+            scores[excluded] = -np.inf
+
+        k = min(k, len(ids))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(int(ids[row]), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+
+class _IndexLock:
+    def __init__(self, index: VectorIndex):
+        self.index = index
+        self._file = None
+
+    def __enter__(self):
+        self.index._lock.acquire()
+        self.index._lock_depth += 1
+
+        # flock is per open file, so only the outermost holder takes it
+        if fcntl is not None and self.index._lock_depth == 1:
+            self.index.directory.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.index.lock_path, "a")
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self.index
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self.index._lock_depth -= 1
+        self.index._lock.release()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
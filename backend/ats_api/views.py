@@ -1,27 +1,60 @@
 import os
-import base64
 import io
 import json
 import hashlib
 import logging
 import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import timedelta
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 from dotenv import load_dotenv
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from pdf2image import convert_from_bytes
-from pdf2image.exceptions import PDFPageCountError
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-from huggingface_hub import login
-from sentence_transformers import SentenceTransformer, util
-from django.db import transaction
+try:
+    from pypdf import PdfReader
+except ImportError:  # text-layer fast path disabled, every CV goes through vision
+    PdfReader = None
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 
 from rest_framework.pagination import PageNumberPagination
 
-from .models import Candidat, CV, JobOffer, Evaluation
+from .extraction_backends import create_backend
+from .metrics import (
+    CACHE_LOOKUPS,
+    CV_EXTRACTIONS,
+    GEMINI_CALLS,
+    PAGES_RENDERED,
+    Gauge,
+    render_metrics,
+    run_in_context,
+    timed,
+)
+from .ratelimit import RateLimiter
+from .similarity_backends import embedding_model_id, load_similarity_model
+from .embedding_server import EmbeddingClient, EmbeddingServerError
+from .vector_index import VectorIndex
+from .rendering import (
+    PDFReadError,
+    RenderPool,
+    RenderPoolError,
+    get_image_profile,
+    record_encoding,
+    get_encoding_stats,
+    render_and_encode,
+    resolve_render_backend,
+)
+from .models import (
+    Candidat, CV, JobOffer, Evaluation, EvaluationBatch, EvaluationBatchItem, TextEmbedding, JobExtraction
+)
 from django.db.models import Q
 
 logger = logging.getLogger(__name__)
@@ -33,32 +66,200 @@ load_dotenv(os.path.join(BASE_DIR, ".env"))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 HF_TOKEN = os.getenv("HF_TOKEN")
 
-
 if not GEMINI_API_KEY:
     logger.warning("GEMINI_API_KEY not set")
-else:
-    genai.configure(api_key=GEMINI_API_KEY)
 
-if HF_TOKEN:
-    login(token=HF_TOKEN)
-else:
+if not HF_TOKEN:
     logger.warning("HF_TOKEN not set")
 
+# Shared Gemini connections: "grpc" or "rest" transport, pool size (gRPC channels /
+# persistent HTTPS connections) and keep-alive interval of idle connections
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "grpc")
+GEMINI_POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "4"))
+GEMINI_KEEPALIVE_SECONDS = int(os.getenv("GEMINI_KEEPALIVE_SECONDS", "300"))
+
+# Gemini quota shared by every call of the process (0 = no limit), in-flight calls
+# start at GEMINI_MAX_CONCURRENCY and are halved on each 429, quota and 5xx errors
+# are retried with jittered exponential backoff
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "1000"))
+GEMINI_TOKENS_PER_MINUTE = float(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "1.0"))
+GEMINI_RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "60"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "120"))
+
+# Who answers the extraction prompts: "gemini", "stub" (manage.py run_extraction_stub),
+# "record" (Gemini + save responses to EXTRACTION_RECORD_DIR) or "replay" (saved responses only)
+EXTRACTION_BACKEND = os.getenv("EXTRACTION_BACKEND", "gemini")
+EXTRACTION_STUB_URL = os.getenv("EXTRACTION_STUB_URL", "http://127.0.0.1:8765")
+EXTRACTION_RECORD_DIR = Path(os.getenv("EXTRACTION_RECORD_DIR", BASE_DIR / "extraction_records"))
+
+# Token estimates reserved before a call (corrected with the real usage afterwards)
+GEMINI_TOKENS_PER_IMAGE = 1300
+GEMINI_CHARS_PER_TOKEN = 4
+
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 MAX_PDF_PAGES = 3
+MAX_CVS_PER_REQUEST = 20
 ALLOWED_MIME_TYPES = ["application/pdf"]
 MODEL_NAME = "vahoaka/sentence-transformers-model-vahoaka-v1"
 
+# Similarity model inference: "torch" (full precision) or "onnx_int8" (exported once to
+# SIMILARITY_EXPORT_DIR and quantized for SIMILARITY_QUANTIZATION: avx2, avx512, avx512_vnni, arm64)
+SIMILARITY_BACKEND = os.getenv("SIMILARITY_BACKEND", "torch")
+SIMILARITY_QUANTIZATION = os.getenv("SIMILARITY_QUANTIZATION", "avx2")
+SIMILARITY_EXPORT_DIR = Path(os.getenv("SIMILARITY_EXPORT_DIR", BASE_DIR / "similarity_models"))
+# Cached embeddings and vector indexes are tied to the model and the backend that produced them
+EMBEDDING_MODEL_ID = embedding_model_id(MODEL_NAME, SIMILARITY_BACKEND, SIMILARITY_QUANTIZATION)
+
+# Bump when normalize_similarity or the compared texts change: stored scores from another
+# SCORE_VERSION are recomputed by `manage.py rescore_evaluations` / POST /api/rescore/
+SCORING_VERSION = "1"
+SCORE_VERSION = f"{EMBEDDING_MODEL_ID}#scoring-{SCORING_VERSION}"
+RESCORE_CHUNK_SIZE = 2000
+
+# Encode through the shared embedding server (manage.py run_embedding_server) on this Unix
+# socket instead of loading the model in every worker ("" = load the model in-process)
+EMBEDDING_SERVER_SOCKET = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "60"))
+
+# "auto": send the PDF text layer to Gemini when it has enough content, else the page image
+# "image": always rasterize (previous behaviour)
+CV_EXTRACTION_MODE = os.getenv("CV_EXTRACTION_MODE", "auto")
+MIN_TEXT_LAYER_CHARS = int(os.getenv("MIN_TEXT_LAYER_CHARS", "200"))
+
+# Page rasterizer: "auto", "pdfium" (in-process) or "poppler" (pdftoppm). PDFium renders one page
+# at a time per process, so "auto" only picks it when RENDER_PROCESSES > 0 (or poppler is missing)
+PDF_RENDER_BACKEND = os.getenv("PDF_RENDER_BACKEND", "auto")
+
+# Render/encode in a shared pool of this many processes (0 = in the calling thread),
+# with at most RENDER_QUEUE_DEPTH CVs waiting and RENDER_TIMEOUT seconds per CV
+RENDER_PROCESSES = int(os.getenv("RENDER_PROCESSES", "0"))
+RENDER_QUEUE_DEPTH = int(os.getenv("RENDER_QUEUE_DEPTH", "32"))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "60"))
+
+# Page image encoding profile for the vision path (see rendering.IMAGE_PROFILES),
+# "png" for the original 200 dpi colour encoding
+CV_IMAGE_PROFILE = os.getenv("CV_IMAGE_PROFILE", "png_fast")
+
+# Number of CVs rasterized / sent to Gemini at the same time (1 = sequential)
+CV_EXTRACTION_WORKERS = max(1, int(os.getenv("CV_EXTRACTION_WORKERS", "4")))
+
+# Number of texts per forward pass when encoding a whole batch of CVs
+EMBEDDING_BATCH_SIZE = max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", "32")))
+# Keys per query when looking up cached embeddings (stays under SQLite's variable limit)
+EMBEDDING_LOOKUP_CHUNK = 500
+
+# Job description extractions are reused for this long (seconds), oldest evicted past the cap
+JOB_EXTRACTION_CACHE_TTL = int(os.getenv("JOB_EXTRACTION_CACHE_TTL", str(7 * 24 * 3600)))
+JOB_EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("JOB_EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+
+# Memory-mapped nearest-neighbour indexes over stored embeddings
+VECTOR_INDEX_DIR = Path(os.getenv("VECTOR_INDEX_DIR", BASE_DIR / "vector_index"))
+VECTOR_INDEX_SYNC_CHUNK = 1000
+MAX_RANKING_SIZE = 200
+
 # Lazy load the model
 _similarity_model = None
+_similarity_model_lock = threading.Lock()
+_similarity_model_error = None
+_render_pool_lock = threading.Lock()
+_gemini_registry = None
+_gemini_registry_lock = threading.Lock()
+_job_extraction_locks: dict[str, tuple[threading.Lock, int]] = {}
+_job_extraction_locks_lock = threading.Lock()
+_extraction_backend = None
+_gemini_limiter = RateLimiter(
+    GEMINI_REQUESTS_PER_MINUTE,
+    GEMINI_TOKENS_PER_MINUTE,
+    GEMINI_MAX_CONCURRENCY,
+    max_retries=GEMINI_MAX_RETRIES,
+    base_delay=GEMINI_RETRY_BASE_DELAY,
+    max_delay=GEMINI_RETRY_MAX_DELAY,
+)
+Gauge(
+    "ats_gemini_concurrency_limit",
+    "Current adaptive limit on in-flight extraction calls",
+    lambda: int(_gemini_limiter.concurrency.limit),
+)
 
 def get_similarity_model():
-    global _similarity_model
+    """
+    Load the SentenceTransformer on first use (torch / onnxruntime are only imported here),
+    or return a client of the embedding server when EMBEDDING_SERVER_SOCKET is set.
+    """
+
+    global _similarity_model, _similarity_model_error
     if _similarity_model is None:
-        _similarity_model = SentenceTransformer(MODEL_NAME)
+        with _similarity_model_lock:
+            if _similarity_model is None and EMBEDDING_SERVER_SOCKET:
+                _similarity_model = EmbeddingClient(
+                    EMBEDDING_SERVER_SOCKET, EMBEDDING_MODEL_ID, timeout=EMBEDDING_SERVER_TIMEOUT
+                )
+            if _similarity_model is None:
+                try:
+                    # The token is passed to the hub downloads, no login() round trip
+                    _similarity_model = load_similarity_model(
+                        MODEL_NAME,
+                        backend=SIMILARITY_BACKEND,
+                        quantization=SIMILARITY_QUANTIZATION,
+                        export_dir=SIMILARITY_EXPORT_DIR,
+                        token=HF_TOKEN,
+                    )
+                except Exception as e:
+                    _similarity_model_error = str(e)
+                    raise
+                _similarity_model_error = None
     return _similarity_model
 
 
+def similarity_model_status() -> str:
+    """"loaded", "warming" (loading in another thread), "not_loaded" or "error: ..." without blocking"""
+
+    if EMBEDDING_SERVER_SOCKET:
+        try:
+            return get_similarity_model().stats()["model"]
+        except EmbeddingServerError as e:
+            return f"error: {e}"
+
+    if _similarity_model is not None:
+        return "loaded"
+    if _similarity_model_lock.locked():
+        return "warming"
+    if _similarity_model_error:
+        return f"error: {_similarity_model_error}"
+    return "not_loaded"
+
+
+def warm_up_similarity_model() -> threading.Thread:
+    """Start loading the similarity model in a daemon thread"""
+
+    def _load():
+        started = time.perf_counter()
+        try:
+            get_similarity_model()
+        except Exception:
+            logger.exception("Similarity model warm-up failed")
+        else:
+            logger.info("Similarity model loaded in %.1fs", time.perf_counter() - started)
+
+    thread = threading.Thread(target=_load, name="similarity-model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def cos_sim(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every row of a with every row of b"""
+
+    a = np.atleast_2d(a)
+    b = np.atleast_2d(b)
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return a @ b.T
+
+
 # HELPERS
 
 def normalize_similarity(score: float) -> float:
@@ -67,18 +268,88 @@ def normalize_similarity(score: float) -> float:
     return round(max(0, min(100, (score + 1) / 2 * 100)), 2)
 
 
+def embedding_key(text: str) -> str:
+    """Cache key of a text embedding, tied to the current similarity model"""
+
+    return hashlib.sha256(f"{EMBEDDING_MODEL_ID}\n{text}".encode("utf-8")).hexdigest()
+
+
+def encode_texts(texts: list[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+    """
+    Embed texts (one float32 row per text), reusing TextEmbedding rows.
+
+    Only texts never seen with the current EMBEDDING_MODEL_ID go through the model,
+    in a single encode pass; their vectors are stored for the next call.
+    """
+
+    keys = [embedding_key(text) for text in texts]
+    vectors = {}
+    
+    unique_keys = list(dict.fromkeys(keys))
+    for i in range(0, len(unique_keys), EMBEDDING_LOOKUP_CHUNK):
+        for key, vector in TextEmbedding.objects.filter(
+            key__in=unique_keys[i:i + EMBEDDING_LOOKUP_CHUNK]
+        ).values_list("key", "vector"):
+            vectors[key] = np.frombuffer(vector, dtype=np.float32)
+    
+    missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+    
+    CACHE_LOOKUPS.inc(len(unique_keys) - len(missing), cache="embedding", result="hit")
+    CACHE_LOOKUPS.inc(len(missing), cache="embedding", result="miss")
+    
+    if missing:
+        model = get_similarity_model()
+        with timed("embedding"):
+            embeddings = model.encode(
+                list(missing.values()),
+                batch_size=batch_size,
+                convert_to_numpy=True
+            ).astype(np.float32)
+        
+        TextEmbedding.objects.bulk_create([
+            TextEmbedding(
+                key=key,
+                model_name=EMBEDDING_MODEL_ID,
+                dimension=embedding.shape[0],
+                vector=embedding.tobytes()
+            )
+            for key, embedding in zip(missing, embeddings)
+        ], ignore_conflicts=True)
+        
+        vectors.update(zip(missing, embeddings))
+    
+    return np.stack([vectors[key] for key in keys])
+
+
 def semantic_similarity(text_a: str, text_b: str) -> float:
 
     if not text_a or not text_b:
         return 0.0
 
-    model = get_similarity_model()
-    emb = model.encode([text_a, text_b], convert_to_tensor=True)
-    score = util.cos_sim(emb[0], emb[1]).item()
+    emb = encode_texts([text_a, text_b])
+    score = float(cos_sim(emb[0], emb[1])[0, 0])
 
     return normalize_similarity(score)
 
 
+def semantic_similarity_batch(texts: list[str], reference: str, batch_size: int = EMBEDDING_BATCH_SIZE) -> list[float]:
+    """Score many texts against one reference text (job text encoded once, all texts in one pass)"""
+
+    scores = [0.0] * len(texts)
+    indexes = [i for i, text in enumerate(texts) if text]
+    
+    if not reference or not indexes:
+        return scores
+
+    embeddings = encode_texts([reference] + [texts[i] for i in indexes], batch_size=batch_size)
+    similarities = cos_sim(embeddings[:1], embeddings[1:])[0].tolist()
+
+    for i, similarity in zip(indexes, similarities):
+        scores[i] = normalize_similarity(similarity)
+
+    return scores
+
+
 def extract_json(raw: str) -> dict:
     """Extract and repair JSON from Gemini output (very tolerant)."""
 
@@ -136,36 +407,92 @@ def validate_pdf(pdf_file) -> tuple[bool, Optional[str]]:
     return True, None
 
 
-def pdf_to_base64_image(pdf_bytes: bytes, page_num: int = 0) -> str:
-    """Convert single PDF page to base64-encoded PNG image with memory management"""
+def extract_pdf_text(pdf_bytes: bytes, max_pages: int = MAX_PDF_PAGES) -> str:
+    """Read the embedded text layer of the first pages ("" if none or pypdf missing)"""
 
+    if PdfReader is None:
+        return ""
+    
     try:
-        images = convert_from_bytes(
-            pdf_bytes,
-            dpi=200,
-            fmt="png",
-            first_page=page_num + 1,
-            last_page=page_num + 1
-        )
-        
-        if not images:
-            raise ValueError("No pages found in PDF")
-        
-        img = images[0]
-        buf = io.BytesIO()
-        img.save(buf, format="PNG", optimize=True)
-        b64 = base64.b64encode(buf.getvalue()).decode("utf-8")
-        
-        # Clean up
-        buf.close()
-        del images
-        
-        return b64
-        
-    except PDFPageCountError:
-        raise ValueError("Could not read PDF - file may be corrupted")
+        with timed("text_layer"):
+            reader = PdfReader(io.BytesIO(pdf_bytes))
+            pages = reader.pages[:max_pages]
+            return "\n".join(page.extract_text() or "" for page in pages).strip()
+    except Exception as e:
+        logger.warning(f"Could not read PDF text layer: {str(e)}")
+        return ""
+
+
+def has_usable_text_layer(text: str) -> bool:
+    """True when a text layer has enough real content to skip the vision path"""
+
+    return sum(c.isalnum() for c in text) >= MIN_TEXT_LAYER_CHARS
+
+
+_render_pool = None
+
+def get_render_pool() -> Optional[RenderPool]:
+    """Shared render process pool, None when RENDER_PROCESSES is 0 (render in the calling thread)"""
+
+    global _render_pool
+    if _render_pool is None and RENDER_PROCESSES > 0:
+        with _render_pool_lock:
+            if _render_pool is None:
+                _render_pool = RenderPool(RENDER_PROCESSES, RENDER_QUEUE_DEPTH, RENDER_TIMEOUT)
+    return _render_pool
+
+
+def rasterize_pages(pdf_bytes: bytes, first_page: int, last_page: int, profile_name: Optional[str] = None) -> list[tuple[str, str]]:
+    """
+    Render pages first_page..last_page and encode them with an image profile.
+
+    Runs in the shared render process pool when enabled, in the calling thread
+    otherwise. Returns one (base64 data, mime type) per page. Encoded size and
+    timings are recorded per profile (see rendering.get_encoding_stats).
+    """
+
+    profile_name = profile_name or CV_IMAGE_PROFILE
+    get_image_profile(profile_name)
+    
+    pool = get_render_pool()
+    backend = resolve_render_backend(PDF_RENDER_BACKEND, pooled=pool is not None)
+    args = (pdf_bytes, first_page, last_page, profile_name, backend)
+
+    try:
+        with timed("rasterize"):
+            if pool is not None:
+                pages, timings = pool.run(render_and_encode, *args)
+            else:
+                pages, timings = render_and_encode(*args)
+    
+    except (PDFReadError, RenderPoolError):
+        raise
     except Exception as e:
         raise ValueError(f"PDF conversion failed: {str(e)}")
+    
+    for encoded_bytes, render_seconds, encode_seconds in timings:
+        record_encoding(profile_name, encoded_bytes, render_seconds, encode_seconds)
+    
+    PAGES_RENDERED.inc(len(pages), profile=profile_name)
+    
+    return pages
+
+
+def pdf_to_base64_images(pdf_bytes: bytes, max_pages: int = MAX_PDF_PAGES, profile_name: Optional[str] = None) -> list[tuple[str, str]]:
+    """
+    Render the first max_pages pages, returns one (base64 data, mime type) per page.
+
+    The PDF is handed to the renderer once for the whole range and the pages
+    are encoded concurrently.
+    """
+
+    return rasterize_pages(pdf_bytes, 1, max_pages, profile_name)
+
+
+def pdf_to_base64_image(pdf_bytes: bytes, page_num: int = 0, profile_name: Optional[str] = None) -> tuple[str, str]:
+    """Render and encode a single PDF page, returns (base64 data, mime type)"""
+
+    return rasterize_pages(pdf_bytes, page_num + 1, page_num + 1, profile_name)[0]
 
 
 # PROMPTS
@@ -231,71 +558,251 @@ NOTES:
 
 # GEMINI PIPELINE
 
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.0,
+    "top_p": 0.95,
+    "max_output_tokens": 2048,
+}
+
+# Enum names, so google.generativeai is only imported with the first Gemini call
+GEMINI_SAFETY_SETTINGS = {
+    "HARM_CATEGORY_HARASSMENT": "BLOCK_NONE",
+    "HARM_CATEGORY_HATE_SPEECH": "BLOCK_NONE",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT": "BLOCK_NONE",
+    "HARM_CATEGORY_DANGEROUS_CONTENT": "BLOCK_NONE",
+}
+
+
+def get_gemini_registry():
+    """Process-wide Gemini client registry (connections are reused across calls)"""
+
+    global _gemini_registry
+    if _gemini_registry is None:
+        with _gemini_registry_lock:
+            if _gemini_registry is None:
+                from .gemini import GeminiRegistry
+
+                _gemini_registry = GeminiRegistry(
+                    GEMINI_API_KEY,
+                    transport=GEMINI_TRANSPORT,
+                    pool_size=GEMINI_POOL_SIZE,
+                    keepalive_seconds=GEMINI_KEEPALIVE_SECONDS,
+                )
+    return _gemini_registry
+
+
 def create_gemini_model():
-    """Create configured Gemini model instance"""
-
-    return genai.GenerativeModel(
-        "gemini-2.5-flash",
-        generation_config={
-            "temperature": 0.0,
-            "top_p": 0.95,
-            "max_output_tokens": 2048,
-        },
-        safety_settings={
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-        }
+    """Return the shared configured Gemini model instance"""
+
+    return get_gemini_registry().get_model(
+        GEMINI_MODEL,
+        GEMINI_GENERATION_CONFIG,
+        GEMINI_SAFETY_SETTINGS,
     )
 
 
+def estimate_gemini_tokens(content: list) -> int:
+    """Rough prompt size of a generate_content call"""
+
+    tokens = 0
+    for part in content:
+        if "text" in part:
+            tokens += len(part["text"]) // GEMINI_CHARS_PER_TOKEN
+        else:
+            tokens += GEMINI_TOKENS_PER_IMAGE
+    return tokens + GEMINI_GENERATION_CONFIG["max_output_tokens"]
+
+
+def get_extraction_backend():
+    """Backend selected by EXTRACTION_BACKEND (see extraction_backends.py)"""
+
+    global _extraction_backend
+    if _extraction_backend is None:
+        _extraction_backend = create_backend(
+            EXTRACTION_BACKEND,
+            model_factory=create_gemini_model,
+            timeout=GEMINI_TIMEOUT,
+            stub_url=EXTRACTION_STUB_URL,
+            record_dir=EXTRACTION_RECORD_DIR,
+        )
+    return _extraction_backend
+
+
+def generate_content(content: list, kind: str) -> str:
+    """Run a "job" or "cv" extraction prompt through the shared rate limiter (retries quota and server errors)"""
+
+    backend = get_extraction_backend()
+    try:
+        with timed("gemini"):
+            text, _ = _gemini_limiter.call(
+                lambda: backend.generate(content),
+                estimated_tokens=estimate_gemini_tokens(content),
+                used_tokens=lambda result: result[1],
+            )
+    except Exception:
+        GEMINI_CALLS.inc(kind=kind, outcome="error")
+        raise
+    
+    GEMINI_CALLS.inc(kind=kind, outcome="ok")
+    return text
+
+
 def gemini_extract_job(job_description: str) -> dict:
     """Extract job title and competences from job description"""
 
     prompt = gemini_extract_job_prompt(job_description)
-    model = create_gemini_model()
     
     try:
-        response = model.generate_content([{"text": prompt}])
+        text = generate_content([{"text": prompt}], kind="job")
         
-        if not response.text:
+        if not text:
             raise ValueError("Empty response from Gemini")
         
-        return extract_json(response.text)
+        return extract_json(text)
     
     except Exception as e:
         logger.exception("Gemini job extraction failed")
         raise ValueError(f"Job extraction failed: {str(e)}")
 
 
+def job_description_key(job_description: str) -> str:
+    """Cache key of a job description (unicode and whitespace normalized)"""
+
+    normalized = " ".join(unicodedata.normalize("NFKC", job_description).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def cached_extract_job(job_description: str, refresh: bool = False) -> dict:
+    """
+    gemini_extract_job with a database cache keyed by the normalized description.
+
+    Entries expire after JOB_EXTRACTION_CACHE_TTL seconds; refresh=True always
+    calls Gemini and replaces the stored extraction. Concurrent misses for the
+    same description make a single Gemini call: the others wait for it and read
+    its result from the cache.
+    """
+
+    key = job_description_key(job_description)
+    requested_at = timezone.now()
+    
+    if not refresh:
+        job_data = _cached_job_data(key, requested_at - timedelta(seconds=JOB_EXTRACTION_CACHE_TTL))
+        if job_data is not None:
+            CACHE_LOOKUPS.inc(cache="job_extraction", result="hit")
+            return job_data
+    
+    with _job_extraction_lock(key):
+        # Written by the call we waited for (a refresh only takes a newer one)
+        job_data = _cached_job_data(
+            key, requested_at if refresh else requested_at - timedelta(seconds=JOB_EXTRACTION_CACHE_TTL)
+        )
+        if job_data is not None:
+            CACHE_LOOKUPS.inc(cache="job_extraction", result="hit")
+            return job_data
+        
+        CACHE_LOOKUPS.inc(cache="job_extraction", result="miss")
+        job_data = gemini_extract_job(job_description)
+        
+        defaults = {
+            "job_data": json.dumps(job_data, ensure_ascii=False),
+            "extracted_at": timezone.now()
+        }
+        try:
+            with transaction.atomic():
+                JobExtraction.objects.update_or_create(key=key, defaults=defaults)
+        except IntegrityError:
+            # Inserted concurrently by another process
+            JobExtraction.objects.filter(key=key).update(**defaults)
+    
+    evict_job_extractions()
+    
+    return job_data
+
+
+def _cached_job_data(key: str, since) -> Optional[dict]:
+    if JOB_EXTRACTION_CACHE_TTL <= 0:
+        return None
+    
+    entry = JobExtraction.objects.filter(key=key, extracted_at__gte=since).first()
+    return json.loads(entry.job_data) if entry else None
+
+
+@contextmanager
+def _job_extraction_lock(key: str):
+    """Per-description lock, dropped once no thread holds or waits for it"""
+
+    with _job_extraction_locks_lock:
+        lock, users = _job_extraction_locks.get(key, (threading.Lock(), 0))
+        _job_extraction_locks[key] = (lock, users + 1)
+    
+    try:
+        with lock:
+            yield
+    finally:
+        with _job_extraction_locks_lock:
+            lock, users = _job_extraction_locks[key]
+            if users == 1:
+                del _job_extraction_locks[key]
+            else:
+                _job_extraction_locks[key] = (lock, users - 1)
+
+
+def evict_job_extractions() -> None:
+    """Drop expired cached job extractions and the oldest ones past the size cap"""
+
+    JobExtraction.objects.filter(
+        extracted_at__lt=timezone.now() - timedelta(seconds=JOB_EXTRACTION_CACHE_TTL)
+    ).delete()
+    
+    overflow = list(
+        JobExtraction.objects.order_by("-extracted_at")
+        .values_list("id", flat=True)[JOB_EXTRACTION_CACHE_MAX_ENTRIES:]
+    )
+    if overflow:
+        JobExtraction.objects.filter(id__in=overflow).delete()
+
+
 def gemini_extract_cv(pdf_bytes: bytes) -> dict:
-    """Extract CV data using Gemini vision"""
+    """Extract CV data using Gemini (text layer when usable, vision otherwise)"""
 
-    b64_image = pdf_to_base64_image(pdf_bytes, page_num=0)
+    cv_text = extract_pdf_text(pdf_bytes) if CV_EXTRACTION_MODE == "auto" else ""
     
     prompt = gemini_extract_cv_prompt()
-    model = create_gemini_model()
     
-    content = [
-        {"text": prompt},
-        {"inline_data": {"mime_type": "image/png", "data": b64_image}}
-    ]
+    if has_usable_text_layer(cv_text):
+        # Digital PDF: send the text layer, no rasterization needed
+        CV_EXTRACTIONS.inc(path="text_layer")
+        content = [
+            {"text": prompt},
+            {"text": f"TEXTE DU CV:\n\n{cv_text}"}
+        ]
+    else:
+        # Scanned PDF (or text-layer mode disabled): send every page image in one request
+        CV_EXTRACTIONS.inc(path="vision")
+        pages = pdf_to_base64_images(pdf_bytes)
+        content = [{"text": prompt}]
+        if len(pages) > 1:
+            content.append({"text": f"Le CV comporte {len(pages)} pages, fournies dans l'ordre."})
+        content += [
+            {"inline_data": {"mime_type": mime_type, "data": b64_image}}
+            for b64_image, mime_type in pages
+        ]
+        del pages
     
     try:
-        response = model.generate_content(content)
+        text = generate_content(content, kind="cv")
         
-        if not response.text:
+        if not text:
             raise ValueError("Empty response from Gemini")
         
-        return extract_json(response.text)
+        return extract_json(text)
     
     except Exception as e:
         logger.exception("Gemini CV extraction failed")
         raise ValueError(f"CV extraction failed: {str(e)}")
     finally:
-        # Clean up base64 string from memory
-        del b64_image
+        # Clean up the page image / text from memory
+        del content
 
 
 def get_or_create_candidat(cv_data: dict) -> Candidat:
@@ -327,9 +834,28 @@ def get_or_create_candidat(cv_data: dict) -> Candidat:
     return candidat
 
 
+def pdf_sha256(pdf_file) -> str:
+    """SHA-256 of the raw bytes of an uploaded PDF"""
+
+    digest = hashlib.sha256()
+    for chunk in pdf_file.chunks():
+        digest.update(chunk)
+    pdf_file.seek(0)
+    
+    return digest.hexdigest()
+
+
 def save_cv_to_db(cv_data: dict, pdf_file, candidat: Candidat) -> CV:
     """Save CV to database, avoiding duplicates based on content hash"""
 
+    pdf_hash = pdf_sha256(pdf_file)
+    
+    # Byte-identical PDF already stored
+    existing_cv = CV.objects.filter(pdf_sha256=pdf_hash).first()
+    if existing_cv:
+        logger.info(f"Identical PDF already stored for {existing_cv.candidat_id}, reusing CV {existing_cv.id}")
+        return existing_cv
+    
     competences_str = ", ".join(cv_data.get("competences", []))
     experience_str = cv_data.get("resume_experience", "")
     
@@ -342,20 +868,424 @@ def save_cv_to_db(cv_data: dict, pdf_file, candidat: Candidat) -> CV:
     
     if existing_cv:
         logger.info(f"Duplicate CV found for {candidat.email}, reusing existing")
+        if not existing_cv.pdf_sha256:
+            existing_cv.pdf_sha256 = pdf_hash
+            existing_cv.save(update_fields=["pdf_sha256"])
         return existing_cv
     
     # Create new CV
-    cv = CV.objects.create(
-        candidat=candidat,
-        experience=experience_str,
-        competences=competences_str,
-        source_pdf=pdf_file,
-        texte_brut=json.dumps(cv_data, ensure_ascii=False)
-    )
+    try:
+        with transaction.atomic():
+            cv = CV.objects.create(
+                candidat=candidat,
+                experience=experience_str,
+                competences=competences_str,
+                source_pdf=pdf_file,
+                pdf_sha256=pdf_hash,
+                texte_brut=json.dumps(cv_data, ensure_ascii=False)
+            )
+    except IntegrityError:
+        # Same PDF saved concurrently by another request
+        return CV.objects.get(pdf_sha256=pdf_hash)
     
     return cv
 
 
+def parse_evaluation_request(request) -> tuple[str, list, Optional[str]]:
+    """Read job description and CV uploads from an evaluation request"""
+
+    if "resumes" not in request.FILES:
+        return "", [], "No CV files provided"
+    
+    job_description = request.data.get("job_description", "").strip()
+    if not job_description:
+        return "", [], "Job description is required"
+    
+    pdfs = request.FILES.getlist("resumes")
+    if len(pdfs) > MAX_CVS_PER_REQUEST:
+        return "", [], f"Maximum {MAX_CVS_PER_REQUEST} CVs allowed per request"
+    
+    return job_description, pdfs, None
+
+
+def wants_job_refresh(request) -> bool:
+    """True when the client asks to re-extract the job description instead of using the cache"""
+
+    return str(request.data.get("refresh_job", "")).lower() in ("1", "true", "yes")
+
+
+def save_job_offer(job_description: str, job_data: dict) -> JobOffer:
+    """
+    Create or update the JobOffer identified by the extracted job data and the
+    (normalized) description. Two descriptions extracted to the same data get
+    their own offers, so the stored description is always the text the offer's
+    evaluations were scored against (rescore_evaluations re-encodes it).
+    """
+
+    normalized_job_data = json.dumps(job_data, sort_keys=True)
+    job_fingerprint = hashlib.md5(
+        (normalized_job_data + job_description_key(job_description)).encode()
+    ).hexdigest()
+
+    with transaction.atomic():
+        job_offer, created = JobOffer.objects.update_or_create(
+            fingerprint=job_fingerprint,    # unique identity of this job
+            defaults={
+                "title": job_data.get("job_title", "").strip(),
+                "description": job_description.strip(),
+                "competences_requises": ", ".join(job_data.get("job_competences", [])),
+                "company_name": job_data.get("company_name", "").strip(),
+                "location": job_data.get("location", "").strip(),
+                "type_de_contrat": job_data.get("type_de_contrat", "").strip(),
+                }
+            )
+    
+    # The job text embedding is reused (cached) when the CVs are scored
+    index_job_offer(job_offer)
+    
+    return job_offer
+
+
+def extract_cvs(pdfs, max_workers: int = CV_EXTRACTION_WORKERS, ordered: bool = True):
+    """
+    Validate and extract uploaded CVs on a bounded thread pool.
+
+    Rasterization and the Gemini call run concurrently, database work is left
+    to the caller so writes stay on the calling thread. PDFs already stored
+    byte for byte reuse their saved extraction instead of calling Gemini.
+    Yields (pdf, cv_data, error) tuples in upload order, or as soon as each
+    CV is done when ordered is False.
+    """
+
+    hashes = {id(pdf): pdf_sha256(pdf) for pdf in pdfs if pdf.size <= MAX_FILE_SIZE}
+    known = dict(
+        CV.objects.filter(pdf_sha256__in=set(hashes.values()), texte_brut__isnull=False)
+        .values_list("pdf_sha256", "texte_brut")
+    )
+
+    def _extract(pdf) -> dict:
+        valid, error_msg = validate_pdf(pdf)
+        if not valid:
+            raise ValueError(error_msg)
+        
+        texte_brut = known.get(hashes.get(id(pdf)))
+        if texte_brut:
+            CACHE_LOOKUPS.inc(cache="cv_extraction", result="hit")
+            return json.loads(texte_brut)
+        
+        CACHE_LOOKUPS.inc(cache="cv_extraction", result="miss")
+        return gemini_extract_cv(pdf.read())
+
+    workers = max(1, min(max_workers, len(pdfs)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cv-extract") as pool:
+        # Each task keeps the request's timing collector (Server-Timing)
+        futures = {pool.submit(run_in_context(_extract), pdf): pdf for pdf in pdfs}
+        for future in (futures if ordered else as_completed(futures)):
+            pdf = futures[future]
+            try:
+                yield pdf, future.result(), None
+            except Exception as e:
+                yield pdf, None, e
+
+
+def save_extracted_cv(pdf, cv_data: dict) -> CV:
+    """Save the candidat and CV of an extracted upload (with duplicate check)"""
+
+    with transaction.atomic():
+        candidat = get_or_create_candidat(cv_data)
+        return save_cv_to_db(cv_data, pdf, candidat)
+
+
+def cv_similarity_text(cv_data: dict) -> str:
+    """Text of a CV compared against the job offer"""
+
+    return cv_data.get("resume_experience", "") + " " + " ".join(cv_data.get("competences", []))
+
+
+def save_evaluation(pdf, cv_data: dict, cv_obj: CV, job_offer: JobOffer, score: float) -> dict:
+    """Save the Evaluation of a scored CV and build its result row"""
+
+    with transaction.atomic():
+        evaluation = Evaluation.objects.create(
+            cv=cv_obj,
+            job_offer=job_offer,
+            score=score,
+            explanation=f"Match automatique basé sur similarité sémantique",
+            score_version=SCORE_VERSION
+        )
+    
+    return {
+        "candidat_id": cv_obj.candidat_id,
+        "cv_id": cv_obj.id,
+        "evaluation_id": evaluation.id,
+        "filename": pdf.name,
+        "nom": cv_data['identite'].get('nom', '').strip(),
+        "email": cv_data["identite"].get("email", ""),
+        "telephone": cv_data["identite"].get("telephone", '').strip(),
+        "job_title": cv_data.get("job_title", ""),
+        "score_sur_100": score,
+        "competences": cv_data.get("competences", []),
+        "resume_experience": cv_data.get("resume_experience", "")
+    }
+
+
+def evaluate_extracted_cv(pdf, cv_data: dict, job_offer: JobOffer, job_text: str) -> dict:
+    """Save, score and evaluate a single extracted CV"""
+
+    cv_obj = save_extracted_cv(pdf, cv_data)
+    score = semantic_similarity(cv_similarity_text(cv_data), job_text)
+    
+    # The CV text embedding was just cached by the scoring
+    index_cvs([cv_obj])
+    
+    return save_evaluation(pdf, cv_data, cv_obj, job_offer, score)
+
+
+def evaluate_saved_cvs(saved: list, job_offer: JobOffer, job_text: str) -> list[dict]:
+    """Score already saved (pdf, cv_data, cv_obj) entries in one batch and evaluate them"""
+
+    scores = semantic_similarity_batch(
+        [cv_similarity_text(cv_data) for _, cv_data, _ in saved], job_text
+    )
+    
+    # The CV text embeddings were just cached by the scoring
+    index_cvs([cv_obj for _, _, cv_obj in saved])
+    
+    # All or nothing, so a caller retrying CV by CV never saves an Evaluation twice
+    with transaction.atomic():
+        return [
+            save_evaluation(pdf, cv_data, cv_obj, job_offer, score)
+            for (pdf, cv_data, cv_obj), score in zip(saved, scores)
+        ]
+
+
+def try_evaluate_saved_cvs(saved: list, job_offer: JobOffer, job_text: str) -> list[tuple[Optional[dict], Optional[str]]]:
+    """
+    evaluate_saved_cvs, scoring the CVs one by one when the batch fails.
+
+    Returns one (result, error message) pair per saved entry, so a single
+    failing CV is reported per file instead of failing the whole upload.
+    """
+
+    try:
+        return [(result, None) for result in evaluate_saved_cvs(saved, job_offer, job_text)]
+    except Exception:
+        logger.exception(f"Scoring {len(saved)} CVs in one batch failed, scoring them one by one")
+    
+    outcomes = []
+    for entry in saved:
+        try:
+            outcomes.append((evaluate_saved_cvs([entry], job_offer, job_text)[0], None))
+        except Exception as e:
+            logger.exception(f"Failed to score {entry[0].name}")
+            outcomes.append((None, f"Scoring error: {str(e)}"))
+    
+    return outcomes
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+# VECTOR INDEX
+
+_cv_index = None
+_job_offer_index = None
+
+def get_cv_index() -> VectorIndex:
+    global _cv_index
+    if _cv_index is None:
+        _cv_index = VectorIndex(VECTOR_INDEX_DIR, "cvs", EMBEDDING_MODEL_ID)
+    return _cv_index
+
+
+def get_job_offer_index() -> VectorIndex:
+    global _job_offer_index
+    if _job_offer_index is None:
+        _job_offer_index = VectorIndex(VECTOR_INDEX_DIR, "job_offers", EMBEDDING_MODEL_ID)
+    return _job_offer_index
+
+
+def stored_cv_text(cv: CV) -> str:
+    """Same text as cv_similarity_text, rebuilt from a saved CV"""
+
+    competences = [c for c in cv.competences.split(", ") if c]
+    return cv.experience + " " + " ".join(competences)
+
+
+def job_offer_text(job_offer: JobOffer) -> str:
+    """Same text as the job_text used when evaluating uploads, rebuilt from a saved JobOffer"""
+
+    competences = [c for c in (job_offer.competences_requises or "").split(", ") if c]
+    return job_offer.description + " " + " ".join(competences)
+
+
+def sync_index(index: VectorIndex, queryset, text_fn) -> VectorIndex:
+    """Append rows of queryset saved since the last sync to index"""
+
+    with index.locked():
+        index.refresh()
+        
+        while True:
+            chunk = list(queryset.filter(id__gt=index.last_id).order_by("id")[:VECTOR_INDEX_SYNC_CHUNK])
+            if not chunk:
+                break
+            
+            # Rows indexed when they were saved (index_cvs) only move last_id forward
+            missing = [obj for obj in chunk if obj.id not in index]
+            index.upsert(
+                [obj.id for obj in missing],
+                encode_texts([text_fn(obj) for obj in missing]) if missing else None,
+                last_id=chunk[-1].id
+            )
+    
+    return index
+
+
+def sync_cv_index() -> VectorIndex:
+    return sync_index(
+        get_cv_index(),
+        CV.objects.only("id", "experience", "competences"),
+        stored_cv_text
+    )
+
+
+def sync_job_offer_index() -> VectorIndex:
+    return sync_index(
+        get_job_offer_index(),
+        JobOffer.objects.only("id", "description", "competences_requises"),
+        job_offer_text
+    )
+
+
+def index_cvs(cvs: list[CV]) -> None:
+    """Insert freshly saved CVs in the index so the next ranking does not have to encode them"""
+
+    index = get_cv_index()
+    cvs = [cv for cv in cvs if cv.id not in index]
+    if not cvs:
+        return
+    
+    try:
+        index.upsert([cv.id for cv in cvs], encode_texts([stored_cv_text(cv) for cv in cvs]))
+    except Exception:
+        logger.exception(f"Failed to index CVs {[cv.id for cv in cvs]}")
+
+
+def index_job_offer(job_offer: JobOffer) -> None:
+    """Insert or refresh one job offer in the index (offers are updated in place by fingerprint)"""
+
+    try:
+        get_job_offer_index().upsert([job_offer.id], encode_texts([job_offer_text(job_offer)]))
+    except Exception:
+        logger.exception(f"Failed to index job offer {job_offer.id}")
+
+
+# RESCORING
+
+def stale_evaluations(force: bool = False):
+    """Evaluations whose score was not produced by the current SCORE_VERSION (all of them with force)"""
+
+    qs = Evaluation.objects.all()
+    return qs if force else qs.exclude(score_version=SCORE_VERSION)
+
+
+def pair_scores(cv_vectors: np.ndarray, job_vectors: np.ndarray) -> list[float]:
+    """normalize_similarity of the cosine of each (cv, job) row pair"""
+
+    dots = np.einsum("ij,ij->i", cv_vectors, job_vectors)
+    norms = np.linalg.norm(cv_vectors, axis=1) * np.linalg.norm(job_vectors, axis=1)
+    cosines = dots / np.maximum(norms, 1e-12)
+    return [normalize_similarity(float(cosine)) for cosine in cosines]
+
+
+def rescore_evaluations(
+    chunk_size: int = RESCORE_CHUNK_SIZE,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    force: bool = False,
+    dry_run: bool = False,
+):
+    """
+    Recompute stale Evaluation scores chunk by chunk, yielding progress after each chunk.
+
+    Evaluations are walked by id (keyset pagination), so memory depends on
+    chunk_size only and an interrupted run simply continues with the rows
+    still stale. Each chunk loads the texts of its distinct CVs and job
+    offers, encodes them through encode_texts (embedding cache, large
+    batches) and writes the scores and SCORE_VERSION with one bulk_update.
+    """
+
+    qs = stale_evaluations(force)
+    total = qs.count()
+    last_id = 0
+    done = changed = 0
+    delta_sum = delta_max = 0.0
+    started = time.perf_counter()
+    
+    while True:
+        rows = list(
+            qs.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "cv_id", "job_offer_id", "score")[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        
+        # in_bulk splits the id lists under the database's parameter limit
+        cvs = CV.objects.only("id", "experience", "competences").in_bulk({row[1] for row in rows})
+        job_offers = JobOffer.objects.only("id", "description", "competences_requises").in_bulk({row[2] for row in rows})
+        cv_texts = {cv_id: stored_cv_text(cv) for cv_id, cv in cvs.items()}
+        job_texts = {job_id: job_offer_text(job) for job_id, job in job_offers.items()}
+        
+        # Same rule as semantic_similarity: an empty text scores 0
+        scored = [row for row in rows if cv_texts.get(row[1]) and job_texts.get(row[2])]
+        scores = {row[0]: 0.0 for row in rows}
+        
+        if scored:
+            cv_ids = list(dict.fromkeys(row[1] for row in scored))
+            job_ids = list(dict.fromkeys(row[2] for row in scored))
+            cv_vectors = dict(zip(cv_ids, encode_texts([cv_texts[i] for i in cv_ids], batch_size=batch_size)))
+            job_vectors = dict(zip(job_ids, encode_texts([job_texts[i] for i in job_ids], batch_size=batch_size)))
+            
+            scores.update(zip(
+                [row[0] for row in scored],
+                pair_scores(
+                    np.stack([cv_vectors[row[1]] for row in scored]),
+                    np.stack([job_vectors[row[2]] for row in scored]),
+                )
+            ))
+        
+        deltas = [abs(scores[row[0]] - row[3]) for row in rows]
+        done += len(rows)
+        changed += sum(1 for delta in deltas if delta >= 0.01)
+        delta_sum += sum(deltas)
+        delta_max = max(delta_max, max(deltas))
+        
+        if not dry_run:
+            with transaction.atomic():
+                Evaluation.objects.bulk_update(
+                    [Evaluation(id=row[0], score=scores[row[0]], score_version=SCORE_VERSION) for row in rows],
+                    ["score", "score_version"],
+                    batch_size=500
+                )
+        
+        elapsed = time.perf_counter() - started
+        yield {
+            "score_version": SCORE_VERSION,
+            "total": total,
+            "done": done,
+            "changed": changed,
+            "mean_abs_delta": round(delta_sum / done, 3),
+            "max_abs_delta": round(delta_max, 2),
+            "elapsed_s": round(elapsed, 1),
+            "per_second": round(done / elapsed, 1) if elapsed else 0.0,
+            "dry_run": dry_run,
+        }
+
+
 # API ENDPOINTS
 
 @api_view(["POST"])
@@ -366,6 +1296,7 @@ def evaluate_cv_vs_offer(request):
     Request:
         - resumes: PDF files (multipart/form-data)
         - job_description: string
+        - refresh_job: optional, "true" to re-extract a cached job description
     
     Response:
         {
@@ -377,29 +1308,16 @@ def evaluate_cv_vs_offer(request):
     """
     try:
         # Validation
-        if "resumes" not in request.FILES:
-            return Response({
-                "success": False,
-                "error": "No CV files provided"
-            }, status=400)
-        
-        job_description = request.data.get("job_description", "").strip()
-        if not job_description:
-            return Response({
-                "success": False,
-                "error": "Job description is required"
-            }, status=400)
-        
-        pdfs = request.FILES.getlist("resumes")
-        if len(pdfs) > 20:
+        job_description, pdfs, error_msg = parse_evaluation_request(request)
+        if error_msg:
             return Response({
                 "success": False,
-                "error": "Maximum 20 CVs allowed per request"
+                "error": error_msg
             }, status=400)
         
         # Extract job information
         try:
-            job_data = gemini_extract_job(job_description)
+            job_data = cached_extract_job(job_description, refresh=wants_job_refresh(request))
         except Exception as e:
             logger.exception("Failed to extract job data")
             return Response({
@@ -407,76 +1325,21 @@ def evaluate_cv_vs_offer(request):
                 "error": f"Failed to analyze job description: {str(e)}"
             }, status=500)
         
-        normalized_job_data = json.dumps(job_data, sort_keys=True)
-        job_fingerprint = hashlib.md5(normalized_job_data.encode()).hexdigest()
-
-        # Create JobOffer in database
-        with transaction.atomic():
-            job_offer, created = JobOffer.objects.update_or_create(
-                fingerprint=job_fingerprint,    # unique identity of this job
-                defaults={
-                    "title": job_data.get("job_title", "").strip(),
-                    "description": job_description.strip(),
-                    "competences_requises": ", ".join(job_data.get("job_competences", [])),
-                    "company_name": job_data.get("company_name", "").strip(),
-                    "location": job_data.get("location", "").strip(),
-                    "type_de_contrat": job_data.get("type_de_contrat", "").strip(),
-                    }
-                )
+        job_offer = save_job_offer(job_description, job_data)
         
         # Process CVs
         results = []
         errors = []
+        job_text = job_description + " " + " ".join(job_data.get("job_competences", []))
         
-        for pdf in pdfs:
-            valid, error_msg = validate_pdf(pdf)
-            if not valid:
-                errors.append({"file": pdf.name, "error": error_msg})
-                continue
-            
+        saved = []
+        
+        for pdf, cv_data, error in extract_cvs(pdfs):
             try:
-                # Read PDF bytes
-                pdf_bytes = pdf.read()
-                
-                # Extract CV data
-                cv_data = gemini_extract_cv(pdf_bytes)
-                
-                # Save to database (with duplicate check)
-                with transaction.atomic():
-                    candidat = get_or_create_candidat(cv_data)
-                    cv_obj = save_cv_to_db(cv_data, pdf, candidat)
-                
-                # Calculate similarity score
-                cv_text = cv_data.get("resume_experience", "") + " " + " ".join(cv_data.get("competences", []))
-                job_text = job_description + " " + " ".join(job_data.get("job_competences", []))
-                score = semantic_similarity(cv_text, job_text)
+                if error is not None:
+                    raise error
                 
-                # Save evaluation
-                with transaction.atomic():
-                    evaluation = Evaluation.objects.create(
-                        cv=cv_obj,
-                        job_offer=job_offer,
-                        score=score,
-                        explanation=f"Match automatique basé sur similarité sémantique"
-                    )
-                
-                results.append({
-                    "candidat_id": candidat.id,
-                    "cv_id": cv_obj.id,
-                    "evaluation_id": evaluation.id,
-                    "filename": pdf.name,
-                    "nom": cv_data['identite'].get('nom', '').strip(),
-                    "email": cv_data["identite"].get("email", ""),
-                    "telephone": cv_data["identite"].get("telephone", '').strip(),
-                    "job_title": cv_data.get("job_title", ""),
-                    "score_sur_100": score,
-                    "competences": cv_data.get("competences", []),
-                    "resume_experience": cv_data.get("resume_experience", "")
-                })
-                
-                # Clean up to free memory
-                del pdf_bytes
-                del cv_data
+                saved.append((pdf, cv_data, save_extracted_cv(pdf, cv_data)))
             
             except ValueError as e:
                 errors.append({"file": pdf.name, "error": str(e)})
@@ -484,6 +1347,13 @@ def evaluate_cv_vs_offer(request):
                 logger.exception(f"Failed to process {pdf.name}")
                 errors.append({"file": pdf.name, "error": f"Processing error: {str(e)}"})
         
+        # Score the whole batch in a single encode pass
+        for (pdf, _, _), (result, error) in zip(saved, try_evaluate_saved_cvs(saved, job_offer, job_text)):
+            if error is None:
+                results.append(result)
+            else:
+                errors.append({"file": pdf.name, "error": error})
+        
         if not results:
             return Response({
                 "success": False,
@@ -513,24 +1383,434 @@ def evaluate_cv_vs_offer(request):
         }, status=500)
 
 
+@api_view(["POST"])
+def evaluate_cv_vs_offer_stream(request):
+    """
+    Streaming variant of evaluate_cv_vs_offer (text/event-stream).
+    
+    Same request as /api/upload_and_evaluate/. Events:
+        - job: job offer info, sent once the job description is analyzed
+        - result: one ranked row, sent as soon as its Evaluation is saved
+        - error: {"file", "error"} for a CV that could not be processed
+        - ranking: final payload, same shape as /api/upload_and_evaluate/
+    """
+    try:
+        job_description, pdfs, error_msg = parse_evaluation_request(request)
+        if error_msg:
+            return Response({
+                "success": False,
+                "error": error_msg
+            }, status=400)
+        
+        try:
+            job_data = cached_extract_job(job_description, refresh=wants_job_refresh(request))
+        except Exception as e:
+            logger.exception("Failed to extract job data")
+            return Response({
+                "success": False,
+                "error": f"Failed to analyze job description: {str(e)}"
+            }, status=500)
+        
+        job_offer = save_job_offer(job_description, job_data)
+    
+    except Exception as e:
+        logger.exception("Unexpected error in evaluate_cv_vs_offer_stream")
+        return Response({
+            "success": False,
+            "error": "Internal server error",
+            "details": str(e)
+        }, status=500)
+    
+    job_text = job_description + " " + " ".join(job_data.get("job_competences", []))
+    
+    def events():
+        yield sse_event("job", {
+            "job_id": job_offer.id,
+            "job_title": job_offer.title,
+            "job_description": job_description,
+            "job_competences": job_data.get("job_competences"),
+            "count": len(pdfs)
+        })
+        
+        positions = {id(pdf): i for i, pdf in enumerate(pdfs)}
+        results = []
+        errors = []
+        
+        for pdf, cv_data, error in extract_cvs(pdfs, ordered=False):
+            try:
+                if error is not None:
+                    raise error
+                
+                result = evaluate_extracted_cv(pdf, cv_data, job_offer, job_text)
+                results.append((positions[id(pdf)], result))
+                yield sse_event("result", result)
+                continue
+            
+            except ValueError as e:
+                failure = {"file": pdf.name, "error": str(e)}
+            except Exception as e:
+                logger.exception(f"Failed to process {pdf.name}")
+                failure = {"file": pdf.name, "error": f"Processing error: {str(e)}"}
+            
+            errors.append(failure)
+            yield sse_event("error", failure)
+        
+        if not results:
+            yield sse_event("ranking", {
+                "success": False,
+                "error": "No CVs could be processed",
+                "details": errors
+            })
+            return
+        
+        # Restore upload order first so ties rank like the blocking endpoint
+        results = [result for _, result in sorted(results, key=lambda x: x[0])]
+        ranked = sorted(results, key=lambda x: x["score_sur_100"], reverse=True)
+        
+        yield sse_event("ranking", {
+            "success": True,
+            "job_id": job_offer.id,
+            "job_title": job_offer.title,
+            "job_description": job_description,
+            "job_competences": job_data.get("job_competences"),
+            "top_ranked": ranked,
+            "errors": errors if errors else None
+        })
+    
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_view(["POST"])
+def submit_evaluation_batch(request):
+    """
+    Store CVs and a job description for background evaluation.
+    
+    Same request as /api/upload_and_evaluate/, but returns immediately.
+    The batch is processed by `manage.py run_batch_worker`.
+    
+    Response (202):
+        {
+            "success": true,
+            "batch_id": 1,
+            "status": "pending",
+            "count": 5
+        }
+    """
+    try:
+        job_description, pdfs, error_msg = parse_evaluation_request(request)
+        if error_msg:
+            return Response({
+                "success": False,
+                "error": error_msg
+            }, status=400)
+        
+        with transaction.atomic():
+            batch = EvaluationBatch.objects.create(
+                job_description=job_description,
+                refresh_job=wants_job_refresh(request)
+            )
+            for pdf in pdfs:
+                valid, error_msg = validate_pdf(pdf)
+                if not valid:
+                    EvaluationBatchItem.objects.create(
+                        batch=batch,
+                        filename=pdf.name,
+                        status=EvaluationBatchItem.FAILED,
+                        error=error_msg
+                    )
+                    continue
+                
+                EvaluationBatchItem.objects.create(
+                    batch=batch,
+                    filename=pdf.name,
+                    source_pdf=pdf
+                )
+        
+        return Response({
+            "success": True,
+            "batch_id": batch.id,
+            "status": batch.status,
+            "count": len(pdfs)
+        }, status=202)
+    
+    except Exception as e:
+        logger.exception("Failed to submit evaluation batch")
+        return Response({
+            "success": False,
+            "error": "Internal server error",
+            "details": str(e)
+        }, status=500)
+
+
+@api_view(["GET"])
+def evaluation_batch_status(request, batch_id):
+    """Report batch status and per-CV progress"""
+
+    batch = EvaluationBatch.objects.filter(id=batch_id).first()
+    if batch is None:
+        return Response({"success": False, "error": "Batch not found"}, status=404)
+    
+    items = [{
+        "id": item.id,
+        "filename": item.filename,
+        "status": item.status,
+        "error": item.error,
+        "evaluation_id": item.evaluation_id,
+    } for item in batch.items.order_by("id")]
+    
+    processed = sum(1 for item in items if item["status"] != EvaluationBatchItem.PENDING)
+    
+    return Response({
+        "success": True,
+        "batch_id": batch.id,
+        "status": batch.status,
+        "error": batch.error,
+        "job_id": batch.job_offer_id,
+        "total": len(items),
+        "processed": processed,
+        "created_at": batch.created_at,
+        "started_at": batch.started_at,
+        "finished_at": batch.finished_at,
+        "items": items
+    })
+
+
+@api_view(["GET"])
+def evaluation_batch_results(request, batch_id):
+    """Return the ranking of a batch, in the same shape as /api/upload_and_evaluate/"""
+
+    batch = EvaluationBatch.objects.select_related("job_offer").filter(id=batch_id).first()
+    if batch is None:
+        return Response({"success": False, "error": "Batch not found"}, status=404)
+    
+    if batch.status in (EvaluationBatch.PENDING, EvaluationBatch.RUNNING):
+        return Response({
+            "success": False,
+            "error": "Batch is not finished yet",
+            "status": batch.status
+        }, status=409)
+    
+    results = []
+    errors = []
+    
+    for item in batch.items.order_by("id"):
+        if item.status == EvaluationBatchItem.DONE:
+            results.append(json.loads(item.result))
+        else:
+            errors.append({"file": item.filename, "error": item.error or f"Not processed ({item.status})"})
+    
+    if not results:
+        return Response({
+            "success": False,
+            "error": batch.error or "No CVs could be processed",
+            "details": errors
+        }, status=422)
+    
+    job_offer = batch.job_offer
+    ranked = sorted(results, key=lambda x: x["score_sur_100"], reverse=True)
+    
+    return Response({
+        "success": True,
+        "batch_id": batch.id,
+        "job_id": job_offer.id,
+        "job_title": job_offer.title,
+        "job_description": batch.job_description,
+        "job_competences": job_offer.competences_requises.split(", ") if job_offer.competences_requises else [],
+        "top_ranked": ranked,
+        "errors": errors if errors else None
+    })
+
+
+@api_view(["GET", "POST"])
+def rank_candidats(request):
+    """
+    Rank CVs already in the database against a job offer.
+    
+    Params (query string or body):
+        - job_id: id of an existing JobOffer, or
+        - job_description: free text of a new offer (not saved)
+        - k: number of CVs to return (default 10)
+    
+    Response:
+        {
+            "success": true,
+            "job_id": 1,
+            "count": 10,
+            "top_ranked": [...]
+        }
+    """
+    params = request.data if request.method == "POST" else request.GET
+    
+    try:
+        k = max(1, min(MAX_RANKING_SIZE, int(params.get("k", 10))))
+    except (TypeError, ValueError):
+        return Response({"success": False, "error": "k must be an integer"}, status=400)
+    
+    job_id = params.get("job_id")
+    job_description = (params.get("job_description") or "").strip()
+    
+    if job_id:
+        if not str(job_id).isdigit():
+            return Response({"success": False, "error": "job_id must be an integer"}, status=400)
+        
+        job_offer = JobOffer.objects.filter(id=job_id).first()
+        if job_offer is None:
+            return Response({"success": False, "error": "Job offer not found"}, status=404)
+        job_text = job_offer_text(job_offer)
+    elif job_description:
+        job_text = job_description
+    else:
+        return Response({
+            "success": False,
+            "error": "job_id or job_description is required"
+        }, status=400)
+    
+    try:
+        index = sync_cv_index()
+        query = encode_texts([job_text])[0]
+        with timed("vector_search"):
+            matches = index.search(query, k=k)
+    except Exception as e:
+        logger.exception("Candidate ranking failed")
+        return Response({
+            "success": False,
+            "error": "Internal server error",
+            "details": str(e)
+        }, status=500)
+    
+    cvs = CV.objects.select_related("candidat").in_bulk([cv_id for cv_id, _ in matches])
+    
+    ranked = [{
+        "candidat_id": cv.candidat_id,
+        "cv_id": cv.id,
+        "nom": cv.candidat.nom,
+        "email": cv.candidat.email,
+        "telephone": cv.candidat.telephone,
+        "score_sur_100": normalize_similarity(similarity),
+        "competences": [c for c in cv.competences.split(", ") if c],
+        "resume_experience": cv.experience,
+    } for cv_id, similarity in matches if (cv := cvs.get(cv_id))]
+    
+    return Response({
+        "success": True,
+        "job_id": int(job_id) if job_id else None,
+        "count": len(ranked),
+        "top_ranked": ranked
+    })
+
+
+@api_view(["GET"])
+def rank_job_offers(request):
+    """
+    Rank job offers for a candidate.
+    
+    Params:
+        - cv_id: id of a CV, or
+        - candidat_id: id of a Candidat (their latest CV is used)
+        - n: number of offers to return (default 10)
+    
+    Response:
+        {
+            "success": true,
+            "cv_id": 1,
+            "count": 10,
+            "results": [...]
+        }
+    """
+    try:
+        n = max(1, min(MAX_RANKING_SIZE, int(request.GET.get("n", 10))))
+    except ValueError:
+        return Response({"success": False, "error": "n must be an integer"}, status=400)
+    
+    cv_id = request.GET.get("cv_id", "").strip()
+    candidat_id = request.GET.get("candidat_id", "").strip()
+    
+    if not (cv_id or candidat_id) or not (cv_id or candidat_id).isdigit():
+        return Response({
+            "success": False,
+            "error": "cv_id or candidat_id (integer) is required"
+        }, status=400)
+    
+    if cv_id:
+        cv = CV.objects.filter(id=cv_id).first()
+    else:
+        cv = CV.objects.filter(candidat_id=candidat_id).order_by("-id").first()
+    
+    if cv is None:
+        return Response({"success": False, "error": "CV not found"}, status=404)
+    
+    try:
+        index = sync_job_offer_index()
+        query = encode_texts([stored_cv_text(cv)])[0]
+        with timed("vector_search"):
+            matches = index.search(query, k=n)
+    except Exception as e:
+        logger.exception("Job offer ranking failed")
+        return Response({
+            "success": False,
+            "error": "Internal server error",
+            "details": str(e)
+        }, status=500)
+    
+    offers = JobOffer.objects.in_bulk([job_id for job_id, _ in matches])
+    
+    results = [{
+        "id": j.id,
+        "title": j.title,
+        "company": j.company_name,
+        "location": j.location,
+        "type_de_contrat": j.type_de_contrat,
+        "score_sur_100": normalize_similarity(similarity),
+    } for job_id, similarity in matches if (j := offers.get(job_id))]
+    
+    return Response({
+        "success": True,
+        "cv_id": cv.id,
+        "candidat_id": cv.candidat_id,
+        "count": len(results),
+        "results": results
+    })
+
+
 @api_view(["GET"])
 def health_check(request):
     """Check API health and dependencies"""
     checks = {
         "api": "healthy",
         "gemini_configured": bool(GEMINI_API_KEY),
+        "gemini_transport": GEMINI_TRANSPORT,
+        "extraction_backend": EXTRACTION_BACKEND,
+        "gemini_rate_limit": _gemini_limiter.get_stats(),
         "huggingface_configured": bool(HF_TOKEN),
-        "similarity_model": None
+        "similarity_model": None,
+        "similarity_backend": SIMILARITY_BACKEND,
+        "image_profile": CV_IMAGE_PROFILE,
+        "render_backend": None,
+        "image_encoding": get_encoding_stats()
     }
     
     try:
-        get_similarity_model()
-        checks["similarity_model"] = "loaded"
-    except Exception as e:
-        checks["similarity_model"] = f"error: {str(e)}"
+        checks["render_backend"] = resolve_render_backend(PDF_RENDER_BACKEND, pooled=RENDER_PROCESSES > 0)
+    except ValueError as e:
+        checks["render_backend"] = f"error: {str(e)}"
+    
+    # Never load the model inside the request: (re)start a background load and report "warming"
+    model_status = similarity_model_status()
+    if model_status not in ("loaded", "warming") and not EMBEDDING_SERVER_SOCKET:
+        warm_up_similarity_model()
+    checks["similarity_model"] = "warming" if model_status == "not_loaded" else model_status
+    
+    if EMBEDDING_SERVER_SOCKET:
+        try:
+            checks["embedding_server"] = get_similarity_model().stats()["batching"]
+        except EmbeddingServerError as e:
+            checks["embedding_server"] = f"error: {str(e)}"
     
     all_healthy = all([
-        checks["gemini_configured"],
+        checks["gemini_configured"] or EXTRACTION_BACKEND in ("stub", "replay"),
         checks["similarity_model"] == "loaded"
     ])
     
@@ -540,6 +1820,53 @@ def health_check(request):
     }, status=200 if all_healthy else 503)
 
 
+@api_view(["GET", "POST"])
+def rescore(request):
+    """
+    Recompute stored Evaluation scores after a MODEL_NAME / scoring change.
+    
+    GET: {"score_version", "total", "stale"} without touching anything.
+    POST (text/event-stream), same work as `manage.py rescore_evaluations`:
+        - force: recompute every score, not only the stale ones
+        - dry_run: compute and report the score drift without writing
+        Events: progress (after each chunk), done (last progress) or error
+    """
+    if request.method == "GET":
+        return Response({
+            "score_version": SCORE_VERSION,
+            "total": Evaluation.objects.count(),
+            "stale": stale_evaluations().count()
+        })
+    
+    def flag(name: str) -> bool:
+        return str(request.data.get(name, "")).lower() in ("1", "true", "yes")
+    
+    force, dry_run = flag("force"), flag("dry_run")
+    
+    def events():
+        progress = {"score_version": SCORE_VERSION, "total": 0, "done": 0}
+        try:
+            for progress in rescore_evaluations(force=force, dry_run=dry_run):
+                yield sse_event("progress", progress)
+        except Exception as e:
+            logger.exception("Rescoring failed")
+            yield sse_event("error", {"error": str(e), **progress})
+            return
+        
+        yield sse_event("done", progress)
+    
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def metrics(request):
+    """Prometheus scrape endpoint (stage histograms, request latency, pipeline counters)"""
+
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 class CandidatPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
@@ -1,18 +1,62 @@
-import axios from 'axios';
+import type { FileError, JobInfo, Ranking, Result } from '@/interfaces/interfaces';
 
 const API_ROOT = 'http://localhost:8000';
 
-export async function uploadResumeAndJob(
+export interface StreamHandlers {
+  onJob?: (data: JobInfo) => void;
+  onResult?: (data: Result) => void;
+  onError?: (data: FileError) => void;
+}
+
+// Streams one event per CV as soon as it is scored, resolves with the final ranking
+export async function streamResumeAndJob(
   files: File[],
-  jobDescription: string
-) {
+  jobDescription: string,
+  handlers: StreamHandlers = {}
+): Promise<Ranking> {
   const form = new FormData();
   files.forEach((f) => form.append('resumes', f));
   form.append('job_description', jobDescription);
 
-  const resp = await axios.post(`${API_ROOT}/api/upload_and_evaluate/`, form, {
-    headers: { 'Content-Type': 'multipart/form-data' },
+  const resp = await fetch(`${API_ROOT}/api/upload_and_evaluate/stream/`, {
+    method: 'POST',
+    body: form,
   });
 
-  return resp.data;
+  if (!resp.ok || !resp.body) {
+    const err = await resp.json().catch(() => ({}));
+    throw new Error(err.error || `Request failed with status ${resp.status}`);
+  }
+
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let ranking: Ranking | null = null;
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const events = buffer.split('\n\n');
+    buffer = events.pop() ?? '';
+
+    for (const raw of events) {
+      const event = raw.match(/^event: (.*)$/m)?.[1];
+      const data = raw.match(/^data: (.*)$/m)?.[1];
+      if (!event || !data) continue;
+
+      const payload = JSON.parse(data);
+      if (event === 'job') handlers.onJob?.(payload);
+      else if (event === 'result') handlers.onResult?.(payload);
+      else if (event === 'error') handlers.onError?.(payload);
+      else if (event === 'ranking') ranking = payload;
+    }
+  }
+
+  if (!ranking || !ranking.success) {
+    throw new Error(ranking?.error || 'No CVs could be processed');
+  }
+
+  return ranking;
 }
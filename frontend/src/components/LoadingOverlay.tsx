@@ -3,8 +3,13 @@ import { Loader2 } from 'lucide-react';
 
 export default function LoadingOverlay() {
   const status = useAppStore((s) => s.uploadStatus);
+  const topRanked = useAppStore((s) => s.top_ranked);
 
-  if (status === 'idle' || status === 'success') return null;
+  // Errors are shown next to the upload form
+  if (status === 'idle' || status === 'success' || status === 'error') return null;
+
+  // Results are streamed in as each CV is scored, stop blocking once the first one is shown
+  if (status === 'processing' && topRanked.length > 0) return null;
 
   return (
     <div className="fixed inset-0 bg-black/40 backdrop-blur-sm flex items-center justify-center z-50">
@@ -2,12 +2,15 @@ import React, { useRef, useState } from 'react';
 import { Button } from '@/components/ui/button';
 import { Upload } from 'lucide-react';
 import { useAppStore } from '@/store/useAppStore';
-import { uploadResumeAndJob } from '@/api/resumeApi';
+import { streamResumeAndJob } from '@/api/resumeApi';
+import type { FileError, Result } from '@/interfaces/interfaces';
 import { Textarea } from './ui/textarea';
 
 export default function UploadResume() {
   const fileRef = useRef(null);
   const [selected, setSelected] = useState<File[]>([]);
+  const [fileErrors, setFileErrors] = useState<FileError[]>([]);
+  const [requestError, setRequestError] = useState<string | null>(null);
   const setTopRanked = useAppStore((s) => s.setTopRanked);
   const setUploadStatus = useAppStore((s) => s.setUploadStatus);
 
@@ -27,9 +30,28 @@ export default function UploadResume() {
     if (selected.length === 0) return;
     try {
       setUploadStatus('uploading');
-      const resp = await uploadResumeAndJob(selected, jobDescription);
+      setFileErrors([]);
+      setRequestError(null);
+      let partial: Result[] = [];
 
-      setUploadStatus('processing');
+      const resp = await streamResumeAndJob(selected, jobDescription, {
+        onJob: (job) => {
+          setUploadStatus('processing');
+          setTopRanked([]);
+          setJobId(job.job_id);
+          setJobTitle(job.job_title);
+          setJobCompetencecs(job.job_competences);
+        },
+        onResult: (result: Result) => {
+          partial = [...partial, result].sort(
+            (a, b) => b.score_sur_100 - a.score_sur_100
+          );
+          setTopRanked(partial);
+        },
+        onError: (error) => {
+          setFileErrors((errors) => [...errors, error]);
+        },
+      });
 
       setTopRanked(resp.top_ranked);
       setJobId(resp.job_id);
@@ -39,6 +61,7 @@ export default function UploadResume() {
     } catch (err) {
       console.error(err);
 
+      setRequestError(err instanceof Error ? err.message : String(err));
       setUploadStatus('error');
     }
   };
@@ -83,6 +106,24 @@ export default function UploadResume() {
       <Button className="active:scale-95" onClick={onSubmit}>
         Analyser
       </Button>
+
+      {(requestError || fileErrors.length > 0) && (
+        <div className="rounded border border-red-200 bg-red-50 p-4 text-sm text-red-700">
+          {requestError && <p className="font-semibold">{requestError}</p>}
+          {fileErrors.length > 0 && (
+            <>
+              <p className="font-semibold mb-1">CV non traités :</p>
+              <ul className="list-disc pl-5">
+                {fileErrors.map((e, i) => (
+                  <li key={`${e.file}-${i}`}>
+                    {e.file} — {e.error}
+                  </li>
+                ))}
+              </ul>
+            </>
+          )}
+        </div>
+      )}
     </div>
   );
 }
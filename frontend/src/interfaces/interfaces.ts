@@ -45,6 +45,26 @@ export interface Result {
   email: string;
 }
 
+export interface JobInfo {
+  job_id: number;
+  job_title: string;
+  job_description: string;
+  job_competences: string[];
+}
+
+export interface FileError {
+  file: string;
+  error: string;
+}
+
+// Final payload of /api/upload_and_evaluate/ (and the stream's "ranking" event)
+export interface Ranking extends JobInfo {
+  success: boolean;
+  top_ranked: Result[];
+  errors: FileError[] | null;
+  error?: string;
+}
+
 export interface Candidat {
   id: number;
   nom: string;